@@ -0,0 +1,86 @@
+"""Report the query plans of element_lab queries against a seeded local database.
+
+With element_lab installed, start the server with
+`docker compose -f benchmarks/docker-compose.yaml up -d`, then run, e.g.,
+
+    python benchmarks/explain.py --seed-rows 10000 --output explain.json \
+        --fail-on full_scan missing_index
+
+The `lab` and `project` schemas are declared under a prefix and, with
+`--seed-rows`, filled with the synthetic rows of `benchmarks/suite.py`. Each query
+of `element_lab.profiling.element_lab_queries` is explained and its findings are
+printed. The script exits with status 1 if any finding is of a kind listed in
+`--fail-on`.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import datajoint as dj
+
+from element_lab import lab, profiling, project
+from element_lab.load import insert_chunked
+from element_lab.utils import element_lab_tables
+
+# the suite is a script next to this one, not part of the installed package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(n: int):
+    """Replace the rows of all tables with the synthetic rows of the suite."""
+    from suite import _clear, _rows
+
+    _clear()
+    for table, rows in _rows(n).items():
+        insert_chunked(table, rows)
+    for table in element_lab_tables().values():  # refresh the optimizer statistics
+        table.connection.query(f"ANALYZE TABLE {table.full_table_name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("DJ_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DJ_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DJ_PASS", "benchmark"))
+    parser.add_argument("--prefix", default="benchmark_")
+    parser.add_argument("--seed-rows", type=int, help="Seed this many rows first.")
+    parser.add_argument("--min-rows", type=int, default=100)
+    parser.add_argument("--output", help="Write the report to this JSON file.")
+    parser.add_argument(
+        "--fail-on", nargs="*", default=[], choices=profiling.FINDING_KINDS
+    )
+    args = parser.parse_args(argv)
+
+    dj.config.update(
+        {
+            "database.host": args.host,
+            "database.user": args.user,
+            "database.password": args.password,
+        }
+    )
+    lab.activate(f"{args.prefix}lab")
+    project.activate(f"{args.prefix}project", linking_module=lab)
+    if args.seed_rows:
+        seed(args.seed_rows)
+
+    results = profiling.profile(min_rows=args.min_rows)
+    failed = 0
+    for result in results:
+        kinds = [finding["kind"] for finding in result["findings"]]
+        failed += any(kind in args.fail_on for kind in kinds)
+        print(f"{result['name']:<45} {', '.join(kinds) or 'ok'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(seed_rows=args.seed_rows, results=results),
+                f,
+                indent=2,
+                default=str,
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Benchmark the start-up cost of importing element_lab modules.
+
+Each module is imported in a fresh interpreter, e.g.,
+`python -c "import element_lab.lab"`, and the wall time and number of modules
+imported are recorded. Thresholds make the script fail on regressions in CI.
+
+Usage:
+    python benchmarks/startup.py --repeat 5 --output startup.json \
+        --max-seconds 2.0 --max-modules 1500
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ("element_lab.lab", "element_lab.project", "element_lab.export")
+
+_PROBE = (
+    "import sys, time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t, len(sys.modules))"
+)
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    """Import `module` in `repeat` fresh interpreters.
+
+    Args:
+        module (str): Dotted module name.
+        repeat (int): Number of interpreters to start.
+
+    Returns:
+        dict: Median and minimum import and process times in seconds, and the number
+            of modules loaded by the interpreter after the import.
+    """
+    import_times, process_times, n_modules = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        process_times.append(time.perf_counter() - start)
+        import_times.append(float(output[0]))
+        n_modules.append(int(output[1]))
+    return dict(
+        module=module,
+        import_seconds_median=statistics.median(import_times),
+        import_seconds_min=min(import_times),
+        process_seconds_median=statistics.median(process_times),
+        modules_imported=max(n_modules),
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--max-seconds", type=float, help="Fail above this median.")
+    parser.add_argument("--max-modules", type=int, help="Fail above this count.")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, repeat=args.repeat) for module in args.modules]
+    failed = False
+    for result in results:
+        print(
+            f"{result['module']:<24} import {result['import_seconds_median']:.3f} s"
+            f"  process {result['process_seconds_median']:.3f} s"
+            f"  modules {result['modules_imported']}"
+        )
+        failed |= bool(
+            args.max_seconds and result["import_seconds_median"] > args.max_seconds
+        )
+        failed |= bool(
+            args.max_modules and result["modules_imported"] > args.max_modules
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(python=sys.version, results=results), f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
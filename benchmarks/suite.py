@@ -0,0 +1,370 @@
+"""Benchmark element_lab against a local MySQL server at realistic scale.
+
+With element_lab installed, start the server with
+`docker compose -f benchmarks/docker-compose.yaml up -d`, then run, e.g.,
+
+    python benchmarks/suite.py --sizes 100 1000 10000 100000 \
+        --output benchmarks/results/$(date +%Y%m%dT%H%M%S).json
+
+The suite declares the `lab` and `project` schemas under a prefix, fills them with
+synthetic rows at each size, and measures activation, bulk inserts into
+`lab.User` and `lab.LabMembership`, the `Lab * Lab.Organization * Organization`
+join, NWB metadata export latency, and the reverse lookups of
+`element_lab.queries` with and without their secondary indexes. Compare two result
+files with `python benchmarks/suite.py --compare old.json new.json`.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+
+import datajoint as dj
+
+from element_lab import lab, project, queries
+from element_lab.export import element_lab_to_nwb_dict, element_lab_to_nwb_dicts
+from element_lab.load import insert_chunked
+from element_lab.utils import element_lab_tables
+from element_lab.version import __version__
+
+_ACTIVATE = """
+import time
+from element_lab import lab, project, queries
+t = time.perf_counter()
+lab.activate("{prefix}lab", fast={fast})
+project.activate("{prefix}project", linking_module=lab, fast={fast})
+print(time.perf_counter() - t)
+"""
+
+
+def _summarize(seconds: list) -> dict:
+    seconds = sorted(seconds)
+    return dict(
+        n=len(seconds),
+        min=seconds[0],
+        median=statistics.median(seconds),
+        p95=seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))],
+    )
+
+
+def _timed(function, repeat: int = 1) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return _summarize(seconds)
+
+
+def _clear():
+    """Delete all rows, children before parents."""
+    for table in reversed(list(element_lab_tables().values())):
+        table.delete_quick()
+
+
+def _rows(n: int) -> dict:
+    """Synthetic rows with `n` labs, users, memberships, protocols and projects."""
+    n_orgs = max(1, n // 10)
+    roles = ["PI", "Postdoc", "Student", "Technician"]
+    return {
+        lab.Organization: [
+            dict(organization=f"org{i}", org_name=f"Organization {i}")
+            for i in range(n_orgs)
+        ],
+        lab.Lab: [
+            dict(
+                lab=f"lab{i}",
+                lab_name=f"Lab {i}",
+                address="1 Main St",
+                time_zone="UTC-5",
+            )
+            for i in range(n)
+        ],
+        lab.Lab.Organization: [
+            dict(lab=f"lab{i}", organization=f"org{i % n_orgs}") for i in range(n)
+        ],
+        lab.UserRole: [dict(user_role=role) for role in roles],
+        lab.User: [
+            dict(
+                user=f"user{i}",
+                user_email=f"user{i}@example.org",
+                user_fullname=f"User {i}",
+            )
+            for i in range(n)
+        ],
+        lab.LabMembership: [
+            dict(
+                lab=f"lab{i % max(1, n // 20)}", user=f"user{i}", user_role=roles[i % 4]
+            )
+            for i in range(n)
+        ],
+        lab.ProtocolType: [dict(protocol_type="IACUC")],
+        lab.Protocol: [
+            dict(
+                protocol=f"protocol{i}",
+                protocol_type="IACUC",
+                protocol_description=f"Protocol {i}",
+            )
+            for i in range(n)
+        ],
+        project.Project: [
+            dict(
+                project=f"project{i}",
+                project_title=f"Project {i}",
+                project_start_date=date(2020, 1, 1),
+            )
+            for i in range(n)
+        ],
+        project.ProjectKeywords: [
+            dict(project=f"project{i}", keyword=f"keyword{k}")
+            for i in range(n)
+            for k in range(3)
+        ],
+        project.ProjectPublication: [
+            dict(project=f"project{i}", publication=f"Publication {i}.{k}")
+            for i in range(n)
+            for k in range(2)
+        ],
+        project.Study: [
+            dict(project=f"project{i}", study="aim1", study_name=f"Aim 1 of {i}")
+            for i in range(n)
+        ],
+        project.Experiment: [
+            dict(
+                experiment=f"experiment{i}",
+                project=f"project{i}",
+                study="aim1",
+                lab=f"lab{i % max(1, n // 20)}",
+            )
+            for i in range(n)
+        ],
+    }
+
+
+def _drop_index(table, column: str) -> str:
+    """Drop the secondary index on `column` and return its name."""
+    name = table.connection.query(
+        "SELECT index_name FROM information_schema.statistics WHERE table_schema=%s"
+        " AND table_name=%s AND column_name=%s AND index_name <> 'PRIMARY'",
+        args=(table.database, table.table_name, column),
+    ).fetchone()[0]
+    table.connection.query(f"ALTER TABLE {table.full_table_name} DROP INDEX `{name}`")
+    return name
+
+
+def bench_indexes(n: int, repeat: int, n_lookups: int) -> list:
+    """Time the reverse lookups of element_lab.queries without and with indexes."""
+    lookups = {
+        "projects_with_keyword": (
+            project.ProjectKeywords,
+            "keyword",
+            lambda i: queries.projects_with_keyword(f"keyword{i % 3}"),
+        ),
+        "users_by_email": (
+            lab.User,
+            "user_email",
+            lambda i: queries.users_by_email(f"user{i}@example.org"),
+        ),
+    }
+    sample = random.Random(n).sample(range(n), min(n, n_lookups))
+    results = []
+    for name, (table, column, lookup) in lookups.items():
+        index_name = _drop_index(table, column)
+        for indexed in (False, True):
+            if indexed:
+                table.connection.query(
+                    f"ALTER TABLE {table.full_table_name}"
+                    f" ADD INDEX `{index_name}` (`{column}`)"
+                )
+            timing = _timed(lambda: [lookup(i) for i in sample], repeat)
+            timing["per_lookup"] = timing["median"] / len(sample)
+            results.append(dict(benchmark=name, rows=n, indexed=indexed, **timing))
+    for name, lookup in (
+        (
+            "experiments_for_lab",
+            lambda i: queries.experiments_for_lab({"lab": f"lab{i}"}),
+        ),
+        (
+            "experiments_for_study",
+            lambda i: queries.experiments_for_study(
+                {"project": f"project{i}", "study": "aim1"}
+            ),
+        ),
+    ):
+        timing = _timed(lambda: [lookup(i) for i in sample], repeat)
+        timing["per_lookup"] = timing["median"] / len(sample)
+        results.append(dict(benchmark=name, rows=n, indexed=True, **timing))
+    return results
+
+
+def bench_activation(prefix: str, repeat: int) -> list:
+    """Time activation of both schemas in fresh interpreters."""
+
+    def _activate(fast):
+        return float(
+            subprocess.run(
+                [sys.executable, "-c", _ACTIVATE.format(prefix=prefix, fast=fast)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()[-1]
+        )
+
+    results = []
+    for fast in (False, True):
+        _activate(fast)  # warm up, storing the definition fingerprint if fast
+        seconds = [_activate(fast) for _ in range(repeat)]
+        results.append(dict(benchmark="activate", fast=fast, **_summarize(seconds)))
+    return results
+
+
+def bench_size(n: int, repeat: int, n_lookups: int) -> list:
+    """Run the data benchmarks with `n` rows per main table."""
+    _clear()
+    rows = _rows(n)
+    results = []
+    for table, table_rows in rows.items():
+        if table in (lab.User, lab.LabMembership):
+            timing = _timed(lambda: insert_chunked(table, table_rows))
+            timing["rows_per_second"] = len(table_rows) / timing["median"]
+            results.append(dict(benchmark=f"insert {table.__name__}", rows=n, **timing))
+        else:
+            insert_chunked(table, table_rows)
+
+    join = lab.Lab * lab.Lab.Organization * lab.Organization
+    results.append(
+        dict(
+            benchmark="fetch Lab * Lab.Organization * Organization",
+            rows=n,
+            **_timed(lambda: join.fetch(as_dict=True), repeat),
+        )
+    )
+    results.append(
+        dict(
+            benchmark="restrict Lab * Lab.Organization * Organization",
+            rows=n,
+            **_timed(lambda: (join & {"lab": f"lab{n // 2}"}).fetch1(), repeat),
+        )
+    )
+
+    sample = random.Random(n).sample(range(n), min(n, n_lookups))
+    keys = [
+        (
+            dict(lab=f"lab{i}"),
+            dict(project=f"project{i}"),
+            dict(protocol=f"protocol{i}"),
+        )
+        for i in sample
+    ]
+    seconds = []
+    for key in keys:
+        start = time.perf_counter()
+        element_lab_to_nwb_dict(*key)
+        seconds.append(time.perf_counter() - start)
+    results.append(
+        dict(benchmark="element_lab_to_nwb_dict", rows=n, **_summarize(seconds))
+    )
+    lab_keys, project_keys, protocol_keys = (list(k) for k in zip(*keys))
+    timing = _timed(
+        lambda: element_lab_to_nwb_dicts(lab_keys, project_keys, protocol_keys), repeat
+    )
+    timing["per_key"] = timing["median"] / len(keys)
+    results.append(dict(benchmark="element_lab_to_nwb_dicts", rows=n, **timing))
+    return results
+
+
+def compare(baseline_path: str, current_path: str) -> None:
+    """Print median times of two result files side by side."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+
+    def _key(result):
+        return (
+            result["benchmark"],
+            result.get("rows"),
+            result.get("fast"),
+            result.get("indexed"),
+        )
+
+    medians = {_key(r): r["median"] for r in baseline["results"]}
+    for result in current["results"]:
+        key = _key(result)
+        label = " ".join(
+            str(value) if name is None else f"{name}={value}"
+            for name, value in zip((None, "rows", "fast", "indexed"), key)
+            if value is not None
+        )
+        if key in medians:
+            ratio = result["median"] / medians[key]
+            print(
+                f"{label:<60} {medians[key]:.4f} -> {result['median']:.4f} s ({ratio:.2f}x)"
+            )
+        else:
+            print(f"{label:<60} new: {result['median']:.4f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("DJ_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DJ_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DJ_PASS", "benchmark"))
+    parser.add_argument("--prefix", default="benchmark_")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the schemas.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    os.environ.update(DJ_HOST=args.host, DJ_USER=args.user, DJ_PASS=args.password)
+    dj.config.update(
+        {
+            "database.host": args.host,
+            "database.user": args.user,
+            "database.password": args.password,
+        }
+    )
+    lab.activate(f"{args.prefix}lab")
+    project.activate(f"{args.prefix}project", linking_module=lab)
+
+    results = bench_activation(args.prefix, args.repeat)
+    for n in args.sizes:
+        results.extend(bench_size(n, args.repeat, args.lookups))
+        results.extend(bench_indexes(n, args.repeat, args.lookups))
+    for result in results:
+        print(json.dumps(result))
+
+    report = dict(
+        created=datetime.now(timezone.utc).isoformat(),
+        element_lab=__version__,
+        datajoint=dj.__version__,
+        python=platform.python_version(),
+        mysql=dj.conn().query("SELECT VERSION()").fetchone()[0],
+        results=results,
+    )
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.keep:
+        project.schema.drop(force=True)
+        lab.schema.drop(force=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
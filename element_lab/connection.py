@@ -0,0 +1,447 @@
+"""Per-thread and pooled database connections for the `lab` and `project` schemas.
+
+DataJoint binds every table to the single connection of its schema, so threads
+querying element_lab tables share one socket. Once `enable_thread_connections` is
+called, the activated `lab` and `project` schemas and their tables are bound to a
+proxy that gives each thread its own connection with the same credentials.
+
+Long-running multi-threaded services, e.g., web APIs with many worker threads,
+should use `enable_connection_pool` instead: each query, or each block within
+`ConnectionPool.lease`, runs on a connection of a bounded pool that is
+health-checked and reconnected before reuse.
+"""
+
+import contextvars
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import datajoint as dj
+
+from . import lab, project
+from .utils import element_lab_tables
+
+logger = logging.getLogger("datajoint")
+
+
+def _connect_like(connection: dj.Connection) -> dj.Connection:
+    """Open a new connection with the credentials of `connection`.
+
+    Only the arguments accepted by the installed `dj.Connection` are passed, e.g.,
+    `init_fun` exists in DataJoint 0.x and `database_name` and `backend` in 2.x.
+    """
+    conn_info = connection.conn_info
+    arguments = dict(
+        host=conn_info.get("host_input", conn_info["host"]),
+        user=conn_info["user"],
+        password=conn_info["passwd"],
+        port=conn_info["port"],
+        use_tls=conn_info.get("ssl_input"),
+        init_fun=getattr(connection, "init_fun", None),
+        database_name=conn_info.get("database_name"),
+        backend=getattr(getattr(connection, "adapter", None), "backend", None),
+    )
+    accepted = inspect.signature(dj.Connection).parameters
+    new_connection = dj.Connection(
+        **{name: value for name, value in arguments.items() if name in accepted}
+    )
+    # fetch and delete look up the registered schemas of the connection
+    new_connection.schemas = connection.schemas
+    return new_connection
+
+
+class ThreadLocalConnection:
+    """Connection proxy that forwards to a separate connection in each thread.
+
+    Args:
+        connection (dj.Connection): Connection whose credentials are reused. It
+            remains in use by the thread that created it.
+        open_on_demand (bool): When True (default), every thread gets its own
+            connection on first use. Otherwise, only threads that called `open`
+            do, and the others keep using `connection`.
+    """
+
+    def __init__(self, connection: dj.Connection, open_on_demand: bool = True):
+        self._template = connection
+        self.open_on_demand = open_on_demand
+        self._local = threading.local()
+        self._local.connection = connection
+        self._connections = [connection]
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> dj.Connection:
+        """The connection of the calling thread, opened on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if not self.open_on_demand:
+                return self._template
+            connection = self.open()
+        return connection
+
+    def open(self) -> dj.Connection:
+        """Open a connection for the calling thread."""
+        connection = _connect_like(self._template)
+        self._local.connection = connection
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def release(self, connections: list):
+        """Close connections opened by `open`, e.g., for threads that have ended."""
+        with self._lock:
+            self._connections = [c for c in self._connections if c not in connections]
+        for connection in connections:
+            if connection is not self._template:
+                connection.close()
+
+    def close(self):
+        """Close the connections opened by this proxy."""
+        with self._lock:
+            connections, self._connections = self._connections[1:], [self._template]
+        for connection in connections:
+            connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __eq__(self, other):
+        return self.conn_info == other.conn_info
+
+    def __hash__(self):
+        return id(self._template)
+
+    def __repr__(self):
+        return f"Thread-local {self._template!r}"
+
+
+class ConnectionPool:
+    """Connection proxy running each query on a connection of a bounded pool.
+
+    Outside `lease`, every method call, e.g., `query`, borrows a connection for
+    the duration of the call. Within `lease`, and while a transaction is open, the
+    calling thread keeps the same connection. Other attributes, e.g., `conn_info`,
+    are read without borrowing, from the connection kept by the thread or else
+    from `connection`. Idle connections are pinged before reuse once
+    `health_check_interval` has passed, and reconnected or replaced if the server
+    closed them.
+
+    Args:
+        connection (dj.Connection): Connection whose credentials are reused. It is
+            not part of the pool.
+        max_size (int): Maximum number of pooled connections. Defaults to 8.
+        timeout (float, optional): Seconds to wait for a free connection before
+            raising TimeoutError. Defaults to 30. None waits indefinitely.
+        health_check_interval (float): Seconds a connection may stay idle before
+            it is pinged on reuse. Defaults to 60.
+    """
+
+    def __init__(
+        self,
+        connection: dj.Connection,
+        max_size: int = 8,
+        timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+    ):
+        assert max_size > 0, "max_size must be a positive integer."
+        self._template = connection
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []  # (time released, connection), most recently released last
+        self._connections = []
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self.waits = 0
+        self.reconnects = 0
+
+    def _healthy(self, connection: dj.Connection) -> dj.Connection:
+        """Return `connection`, reconnected or replaced if the server closed it."""
+        if connection.is_connected:
+            return connection
+        logger.warning("Pooled connection lost. Reconnecting to the server.")
+        self.reconnects += 1
+        try:
+            connection.connect()
+            return connection
+        except Exception:
+            logger.warning("Reconnecting failed. Opening a new connection.")
+        try:
+            replacement = _connect_like(self._template)
+        except Exception:
+            with self._condition:
+                self._connections.remove(connection)
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._connections[self._connections.index(connection)] = replacement
+        return replacement
+
+    def _acquire(self) -> dj.Connection:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._condition:
+            if not self._idle and len(self._connections) >= self.max_size:
+                self.waits += 1
+            while not self._idle and len(self._connections) >= self.max_size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(
+                        f"No pooled connection was released within {self.timeout} s."
+                    )
+                self._condition.wait(remaining)
+            if self._idle:
+                released, connection = self._idle.pop()
+            else:
+                released, connection = None, None
+                self._connections.append(None)  # reserve the slot while connecting
+        if connection is None:
+            try:
+                connection = _connect_like(self._template)
+            except Exception:
+                with self._condition:
+                    self._connections.remove(None)
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._connections[self._connections.index(None)] = connection
+            return connection
+        if time.monotonic() - released > self.health_check_interval:
+            connection = self._healthy(connection)
+        return connection
+
+    def _release(self, connection: dj.Connection):
+        with self._condition:
+            self._idle.append((time.monotonic(), connection))
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self):
+        """Keep one pooled connection for the calling thread within the block.
+
+        Yields:
+            dj.Connection: The connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._acquire()
+            self._local.connection = connection
+            self._local.depth = 0
+        self._local.depth += 1
+        try:
+            yield connection
+        finally:
+            self._local.depth -= 1
+            # `_in_transaction` avoids the ping of `in_transaction`
+            if not self._local.depth and not connection._in_transaction:
+                self._local.connection = None
+                self._release(connection)
+
+    @property
+    @contextmanager
+    def transaction(self):
+        """Transaction on a pooled connection kept by the thread until it ends."""
+        with self.lease() as connection, connection.transaction:
+            yield connection
+
+    def _leased_call(self, name: str):
+        def call(*args, **kwargs):
+            with self.lease() as connection:
+                return getattr(connection, name)(*args, **kwargs)
+
+        return call
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name in ("_template", "_local", "_condition"):
+            raise AttributeError(name)
+        if callable(getattr(dj.Connection, name, None)):
+            return self._leased_call(name)
+        # attributes are read without a lease, from the connection of the thread
+        return getattr(getattr(self._local, "connection", None) or self._template, name)
+
+    def info(self) -> dict:
+        """Number of pooled connections in use and idle, waits and reconnects."""
+        with self._condition:
+            return dict(
+                max_size=self.max_size,
+                size=len(self._connections),
+                idle=len(self._idle),
+                in_use=len(self._connections) - len(self._idle),
+                waits=self.waits,
+                reconnects=self.reconnects,
+            )
+
+    def close(self):
+        """Close the pooled connections."""
+        with self._condition:
+            connections, self._connections, self._idle = self._connections, [], []
+        for connection in connections:
+            if connection is not None:
+                connection.close()
+
+    def __eq__(self, other):
+        return self._template.conn_info == other.conn_info
+
+    def __hash__(self):
+        return id(self._template)
+
+    def __repr__(self):
+        return f"Pooled {self._template!r}"
+
+
+_proxy = None
+_replaced = []  # (object, attribute, original value)
+_lock = threading.RLock()
+_users = 0  # thread_connections blocks in progress
+_owned = False  # whether _proxy was bound by thread_connections
+
+
+def _bind(connection):
+    """Bind the activated element_lab schemas and tables to `connection`."""
+    modules = tuple(m for m in (lab, project) if m.schema.is_activated())
+    targets = [(m.schema, "connection") for m in modules]
+    for table in element_lab_tables(modules).values():
+        targets.append((table, "_connection"))
+        heading = table.__dict__.get("_heading")
+        if heading is not None and heading.table_info is not None:
+            targets.append((heading.table_info, "conn"))
+    for target, attribute in targets:
+        if isinstance(target, dict):
+            _replaced.append((target, attribute, target[attribute]))
+            target[attribute] = connection
+        else:
+            _replaced.append((target, attribute, getattr(target, attribute)))
+            setattr(target, attribute, connection)
+
+
+def enable_thread_connections(proxy: ThreadLocalConnection = None):
+    """Give each thread querying element_lab tables its own connection.
+
+    Args:
+        proxy (ThreadLocalConnection, optional): Proxy to bind. Defaults to a new
+            `ThreadLocalConnection` around the current `lab` schema connection.
+    """
+    global _proxy
+    with _lock:
+        if _proxy is not None:
+            return
+        assert lab.schema.is_activated(), "Activate the lab schema first."
+        _proxy = proxy or ThreadLocalConnection(lab.schema.connection)
+        _bind(_proxy)
+
+
+def disable_thread_connections():
+    """Rebind element_lab to its original connection and close the others."""
+    global _proxy, _owned
+    with _lock:
+        while _replaced:
+            target, attribute, original = _replaced.pop()
+            if isinstance(target, dict):
+                target[attribute] = original
+            else:
+                setattr(target, attribute, original)
+        if _proxy is not None:
+            _proxy.close()
+            _proxy = None
+        _owned = False
+
+
+def enable_connection_pool(
+    max_size: int = 8, timeout: float = 30.0, health_check_interval: float = 60.0
+) -> ConnectionPool:
+    """Run queries on element_lab tables on a bounded pool of connections.
+
+    Disable with `disable_thread_connections`. See `ConnectionPool` for the
+    arguments.
+
+    Returns:
+        ConnectionPool: The pool now bound to element_lab, or the proxy bound
+            previously if per-thread or pooled connections are already enabled.
+    """
+    assert lab.schema.is_activated(), "Activate the lab schema first."
+    with _lock:
+        if _proxy is None:
+            enable_thread_connections(
+                ConnectionPool(
+                    lab.schema.connection,
+                    max_size=max_size,
+                    timeout=timeout,
+                    health_check_interval=health_check_interval,
+                )
+            )
+        return _proxy
+
+
+@contextmanager
+def thread_connections():
+    """Context manager binding element_lab to a connection proxy within the block.
+
+    Unless per-thread or pooled connections are already enabled, the first block
+        binds a `ThreadLocalConnection` that opens connections only for threads
+        calling its `open` method, e.g., the workers of `connection_executor`, so
+        other threads keep the original connection. Blocks may overlap, e.g.,
+        concurrent exports on one event loop: the proxy is unbound when the last
+        block exits.
+
+    Yields:
+        ThreadLocalConnection | ConnectionPool: The bound proxy.
+    """
+    global _users, _owned
+    with _lock:
+        if _proxy is None:
+            assert lab.schema.is_activated(), "Activate the lab schema first."
+            enable_thread_connections(
+                ThreadLocalConnection(lab.schema.connection, open_on_demand=False)
+            )
+            _owned = True
+        _users += 1
+        proxy = _proxy
+    try:
+        yield proxy
+    finally:
+        with _lock:
+            _users -= 1
+            if not _users and _owned:
+                disable_thread_connections()
+
+
+class _ContextExecutor(ThreadPoolExecutor):
+    """Thread pool running each task in a copy of the context of its submitter, so
+    that context variables, e.g., the operations recorded by `instrumentation`,
+    carry over to the workers."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@contextmanager
+def connection_executor(max_workers: int):
+    """Thread pool whose workers query element_lab tables on their own connections.
+
+    The connections opened for the workers are closed when the block exits, after
+        the workers finish. Tasks run in a copy of the context of the caller
+        submitting them.
+
+    Args:
+        max_workers (int): Maximum number of worker threads and connections.
+
+    Yields:
+        ThreadPoolExecutor: The thread pool.
+    """
+    with thread_connections() as proxy:
+        opened = []
+
+        def open_connection():
+            if isinstance(proxy, ThreadLocalConnection):
+                opened.append(proxy.open())
+
+        try:
+            with _ContextExecutor(
+                max_workers=max_workers, initializer=open_connection
+            ) as pool:
+                yield pool
+        finally:
+            if isinstance(proxy, ThreadLocalConnection):
+                proxy.release(opened)
@@ -0,0 +1,325 @@
+"""Fast-path activation of element_lab schemas.
+
+`schema.activate` checks every table with its own query and each table heading is
+later loaded with three more queries. `activate_fast` instead compares a
+fingerprint of the element_lab table definitions with the one stored in the schema
+when it was last declared. If they match and all tables exist, declaration checks
+are skipped. The headings of all tables are then prefetched with bulk
+information_schema queries.
+"""
+
+import hashlib
+import logging
+import re
+from collections import defaultdict
+
+import datajoint as dj
+
+from .utils import element_lab_tables
+from .version import __version__
+
+logger = logging.getLogger("datajoint")
+
+FINGERPRINT_TABLE = "~element_lab"
+# DataJoint versions whose heading queries are served from prefetched rows
+PREFETCH_DATAJOINT_VERSIONS = ("0.13.", "0.14.")
+
+
+def definition_fingerprint(module) -> str:
+    """Hash the definitions of all tables, including part tables, of a module.
+
+    Args:
+        module (module): Schema module, e.g., `element_lab.lab`.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for name, table in element_lab_tables((module,)).items():
+        definition = re.sub(r"\s+", " ", table.definition.strip())
+        digest.update(f"{name}\n{definition}\n".encode())
+    return digest.hexdigest()
+
+
+def _table_names(module) -> set:
+    """Names of the module's tables on the server, derived without a query."""
+    tables = element_lab_tables((module,))
+    names = set()
+    for name, table in tables.items():
+        if issubclass(table, dj.Part):
+            master = tables[name.rsplit(".", 1)[0]]
+            names.add(
+                f"{master.table_name}__{dj.utils.from_camel_case(table.__name__)}"
+            )
+        else:
+            names.add(table.table_name)
+    return names
+
+
+def _fetch_table_status(connection, database: str) -> dict:
+    """Fetch the status of all tables in a schema with one query.
+
+    Returns:
+        dict: Table name mapped to a row in the format of SHOW TABLE STATUS.
+    """
+    rows = connection.query(
+        """
+        SELECT table_name AS Name, engine AS Engine, version AS Version,
+            row_format AS Row_format, table_rows AS `Rows`,
+            avg_row_length AS Avg_row_length, data_length AS Data_length,
+            max_data_length AS Max_data_length, index_length AS Index_length,
+            data_free AS Data_free, auto_increment AS Auto_increment,
+            create_time AS Create_time, update_time AS Update_time,
+            check_time AS Check_time, table_collation AS Collation,
+            checksum AS Checksum, create_options AS Create_options,
+            table_comment AS Comment
+        FROM information_schema.tables WHERE table_schema = %s
+        """,
+        args=(database,),
+        as_dict=True,
+    ).fetchall()
+    return {row["Name"]: row for row in rows}
+
+
+def _fetch_grouped_by_table(connection, query: str, database: str) -> dict:
+    """Run a query over information_schema and group the rows by table name."""
+    grouped = defaultdict(list)
+    for row in connection.query(query, args=(database,), as_dict=True).fetchall():
+        grouped[row.pop("table_name_")].append(row)
+    return grouped
+
+
+class _Rows:
+    """Minimal cursor over prefetched rows."""
+
+    def __init__(self, rows: list):
+        self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    @property
+    def rowcount(self):
+        return len(self._rows)
+
+
+class _PrefetchedConnection:
+    """Serve the per-table heading queries of DataJoint from prefetched results."""
+
+    _patterns = (
+        ("status", re.compile(r'SHOW TABLE STATUS FROM `(.+)` WHERE name="(.+)"')),
+        ("columns", re.compile(r"SHOW FULL COLUMNS FROM `(.+)` IN `(.+)`")),
+        ("keys", re.compile(r"SHOW KEYS FROM `(.+)`\.`(.+)`")),
+    )
+
+    def __init__(self, connection, database: str, status, columns, keys):
+        self._connection = connection
+        self._database = database
+        self._status = status
+        self._columns = columns
+        self._keys = keys
+        self.hits = 0  # queries served from the prefetched rows
+
+    def query(self, query, args=(), **kwargs):
+        for kind, pattern in self._patterns:
+            match = pattern.fullmatch(query.strip())
+            if not match:
+                continue
+            database, table_name = match.groups()
+            if kind == "columns":
+                table_name, database = database, table_name
+            if database != self._database or table_name not in self._status:
+                break
+            self.hits += 1
+            if kind == "status":
+                return _Rows([self._status[table_name]])
+            if kind == "columns":
+                return _Rows(dict(row) for row in self._columns[table_name])
+            return _Rows(dict(row) for row in self._keys[table_name])
+        return self._connection.query(query, args=args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def prefetch_supported() -> bool:
+    """Whether the heading queries of the installed DataJoint can be prefetched."""
+    return dj.__version__.startswith(PREFETCH_DATAJOINT_VERSIONS)
+
+
+def _has_index_expressions(connection) -> bool:
+    """Whether information_schema.statistics has the `expression` column.
+
+    It was added in MySQL 8.0.13 for functional key parts; MariaDB does not have it.
+    """
+    version = connection.query("SELECT VERSION()").fetchone()[0]
+    if "mariadb" in version.lower():
+        return False
+    return tuple(int(n) for n in re.findall(r"\d+", version)[:3]) >= (8, 0, 13)
+
+
+def _prefetch(connection, database: str, table_status: dict) -> _PrefetchedConnection:
+    """Fetch the columns and indexes of all tables of a schema with two queries."""
+    columns = _fetch_grouped_by_table(
+        connection,
+        """
+        SELECT table_name AS table_name_, column_name AS Field,
+            column_type AS Type, collation_name AS Collation, is_nullable AS `Null`,
+            column_key AS `Key`, column_default AS `Default`, extra AS Extra,
+            privileges AS Privileges, column_comment AS Comment
+        FROM information_schema.columns WHERE table_schema = %s
+        ORDER BY table_name, ordinal_position
+        """,
+        database,
+    )
+    keys = _fetch_grouped_by_table(
+        connection,
+        """
+        SELECT table_name AS table_name_, table_name AS `Table`,
+            non_unique AS Non_unique, index_name AS Key_name,
+            seq_in_index AS Seq_in_index, column_name AS Column_name,
+            nullable AS `Null`, {expression} AS Expression
+        FROM information_schema.statistics WHERE table_schema = %s
+        ORDER BY table_name, index_name, seq_in_index
+        """.format(
+            expression="expression" if _has_index_expressions(connection) else "NULL"
+        ),
+        database,
+    )
+    return _PrefetchedConnection(connection, database, table_status, columns, keys)
+
+
+def prefetch_headings(module, table_status: dict = None) -> int:
+    """Load the headings of all tables of an activated schema in bulk.
+
+    Headings are loaded by DataJoint with its own queries answered from the
+        prefetched rows. With DataJoint versions other than
+        `PREFETCH_DATAJOINT_VERSIONS`, or if the bulk queries fail, nothing is
+        prefetched and headings load per table on first use.
+
+    Args:
+        module (module): Activated schema module, e.g., `element_lab.lab`.
+        table_status (dict, optional): Result of a previous table status query.
+
+    Returns:
+        int: Number of headings loaded from prefetched rows.
+    """
+    if not prefetch_supported():
+        logger.debug(
+            f"Heading prefetch is not supported with DataJoint {dj.__version__}"
+        )
+        return 0
+    schema = module.schema
+    connection, database = schema.connection, schema.database
+    try:
+        if table_status is None:
+            table_status = _fetch_table_status(connection, database)
+        prefetched = _prefetch(connection, database, table_status)
+    except Exception as error:
+        logger.warning(f"Heading prefetch failed, loading headings per table: {error}")
+        return 0
+
+    n_loaded = 0
+    for table in element_lab_tables((module,)).values():
+        heading = vars(table).get("_heading")
+        if (
+            heading is None
+            or heading.table_info is None
+            or heading._attributes is not None
+            or heading.table_info["table_name"] not in table_status
+        ):
+            continue
+        hits = prefetched.hits
+        original = heading.table_info["conn"]
+        heading.table_info["conn"] = prefetched
+        try:
+            heading.attributes
+        except Exception as error:
+            heading._attributes = None  # load again per table on first use
+            logger.warning(f"Heading prefetch failed for {table.__name__}: {error}")
+            continue
+        finally:
+            heading.table_info["conn"] = original
+        if prefetched.hits == hits:
+            # DataJoint issued queries that _PrefetchedConnection does not recognize
+            logger.warning(
+                f"Heading queries of DataJoint {dj.__version__} were not recognized;"
+                " headings are loaded per table."
+            )
+            break
+        n_loaded += 1
+    return n_loaded
+
+
+def _store_fingerprint(connection, database: str, module_name: str, fingerprint: str):
+    connection.query(f"""
+        CREATE TABLE IF NOT EXISTS `{database}`.`{FINGERPRINT_TABLE}` (
+            module varchar(64) NOT NULL,
+            fingerprint char(64) NOT NULL,
+            element_lab_version varchar(16) NOT NULL,
+            declared timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (module)
+        ) COMMENT "element_lab table definition fingerprints"
+        """)
+    connection.query(
+        f"REPLACE INTO `{database}`.`{FINGERPRINT_TABLE}`"
+        " (module, fingerprint, element_lab_version) VALUES (%s, %s, %s)",
+        args=(module_name, fingerprint, __version__),
+    )
+
+
+def activate_fast(module, schema_name: str, **activate_kwargs) -> bool:
+    """Activate a schema module, skipping declaration checks when unchanged.
+
+    Args:
+        module (module): Schema module, e.g., `element_lab.lab`.
+        schema_name (str): Schema name on the database server.
+        **activate_kwargs: Keyword arguments passed to `dj.Schema.activate`.
+
+    Returns:
+        bool: True if the stored fingerprint matched and declaration was skipped.
+    """
+    schema = module.schema
+    connection = activate_kwargs.get("connection") or schema.connection or dj.conn()
+    module_name = module.__name__.rsplit(".", 1)[-1]
+    fingerprint = definition_fingerprint(module)
+
+    table_status = _fetch_table_status(connection, schema_name)
+    stored = None
+    if FINGERPRINT_TABLE in table_status:
+        row = connection.query(
+            f"SELECT fingerprint FROM `{schema_name}`.`{FINGERPRINT_TABLE}`"
+            " WHERE module = %s",
+            args=(module_name,),
+        ).fetchone()
+        stored = row and row[0]
+    unchanged = stored == fingerprint and _table_names(module) <= set(table_status)
+
+    tables = list(element_lab_tables((module,)).values())
+    overridden = []
+    if unchanged:
+        for table in tables:
+            if "is_declared" not in vars(table):
+                table.is_declared = True  # shadows the Table.is_declared query
+                overridden.append(table)
+    try:
+        schema.activate(schema_name, **activate_kwargs)
+    finally:
+        for table in overridden:
+            delattr(table, "is_declared")
+
+    if unchanged:
+        logger.debug(f"{module_name} definitions unchanged, skipped declaration")
+        prefetch_headings(module, table_status)
+    else:
+        table_status = _fetch_table_status(connection, schema_name)
+        if schema.create_tables and _table_names(module) <= set(table_status):
+            _store_fingerprint(connection, schema_name, module_name, fingerprint)
+        prefetch_headings(module, table_status)
+    return unchanged
@@ -1,3 +1,39 @@
-from .nwb import element_lab_to_nwb_dict
+"""Export of element_lab metadata.
 
-__all__ = ["element_lab_to_nwb_dict"]
+Submodules are imported on first attribute access, so importing this package does
+not load the `lab` and `project` schemas.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "backfill_nwb_files": "nwb_files",
+    "cache_info": "cache",
+    "changed_keys": "hashes",
+    "clear_cache": "cache",
+    "content_hashes": "hashes",
+    "disable_cache": "cache",
+    "dossiers_to_json": "dossier",
+    "element_lab_to_nwb_dict": "nwb",
+    "element_lab_to_nwb_dicts": "nwb",
+    "element_lab_to_nwb_dicts_async": "parallel",
+    "element_lab_to_nwb_dicts_threaded": "parallel",
+    "enable_cache": "cache",
+    "project_dossiers": "dossier",
+    "project_dossiers_json": "dossier",
+    "write_manifest": "hashes",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
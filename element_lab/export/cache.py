@@ -0,0 +1,170 @@
+"""Opt-in memoization of NWB metadata lookups.
+
+The cache is disabled by default. Once enabled with `enable_cache`, the results of
+`_lab_to_nwb_dict`, `_project_to_nwb_dict` and `_protocol_to_nwb_dict` are kept in
+a bounded least-recently-used cache. Inserts, updates and deletes issued through
+the element_lab `lab` and `project` tables clear the cache.
+"""
+
+import copy
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from ..utils import add_table_method_hook, remove_table_method_hook
+
+logger = logging.getLogger("datajoint")
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "invalidations", "maxsize", "ttl", "currsize"]
+)
+
+_INVALIDATING_METHODS = ("insert", "delete", "delete_quick", "update1")
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an optional time-to-live.
+
+    Args:
+        maxsize (int): Maximum number of entries kept. Defaults to 128.
+        ttl (float, optional): Seconds after which an entry expires. Defaults to
+            None, meaning entries never expire.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = None):
+        assert maxsize > 0, "maxsize must be a positive integer."
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> tuple:
+        """Look up `key`.
+
+        Returns:
+            tuple: (found, value). Value is None when the key was not found.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl is None or time.monotonic() - entry[0] < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation: int = None):
+        """Store `value` under `key`, evicting the least recently used entry.
+
+        Args:
+            key (hashable): Cache key.
+            value (object): Value to store.
+            generation (int, optional): Value of `invalidations` when `value` was
+                computed. If the cache was cleared since, the value is discarded.
+        """
+        with self._lock:
+            if generation is not None and generation != self.invalidations:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries. Hit and miss statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def info(self) -> CacheInfo:
+        """Return hit/miss statistics and the current size of the cache."""
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self.invalidations,
+                self.maxsize,
+                self.ttl,
+                len(self._entries),
+            )
+
+
+_cache = None
+
+
+@contextmanager
+def _invalidate(table_name: str, method_name: str):
+    """Table method hook clearing the cache after data is modified."""
+    try:
+        yield
+    finally:
+        if _cache is not None:
+            _cache.clear()
+
+
+def enable_cache(maxsize: int = 128, ttl: float = None):
+    """Enable memoization of NWB metadata lookups.
+
+    Calling it again replaces the current cache and resets its statistics.
+
+    Args:
+        maxsize (int): Maximum number of cached lookups. Defaults to 128.
+        ttl (float, optional): Seconds after which a cached lookup expires.
+            Defaults to None, meaning lookups only expire on invalidation.
+    """
+    global _cache
+    _cache = LRUCache(maxsize=maxsize, ttl=ttl)
+    for method_name in _INVALIDATING_METHODS:
+        add_table_method_hook(method_name, _invalidate)
+
+
+def disable_cache():
+    """Disable memoization and remove the invalidation hooks."""
+    global _cache
+    _cache = None
+    for method_name in _INVALIDATING_METHODS:
+        remove_table_method_hook(method_name, _invalidate)
+
+
+def clear_cache():
+    """Remove all cached lookups, e.g., after modifying tables outside element_lab."""
+    if _cache is not None:
+        _cache.clear()
+
+
+def cache_info() -> CacheInfo:
+    """Return hit/miss statistics of the cache, or None if it is disabled."""
+    return _cache.info() if _cache is not None else None
+
+
+def memoize(function):
+    """Decorate a single-key NWB lookup so that it uses the cache when enabled."""
+
+    @functools.wraps(function)
+    def wrapper(key: dict) -> dict:
+        cache = _cache
+        if cache is None:
+            return function(key)
+        try:
+            cache_key = (function.__name__, tuple(sorted(key.items())))
+            hash(cache_key)
+        except (AttributeError, TypeError):  # not a dict of hashable values
+            return function(key)
+        generation = cache.invalidations
+        found, value = cache.get(cache_key)
+        if not found:
+            value = function(key)
+            cache.set(cache_key, value, generation=generation)
+        return copy.deepcopy(value)
+
+    return wrapper
@@ -0,0 +1,107 @@
+"""Nested documents describing projects, e.g., to render project pages.
+
+`project_dossiers` fetches all projects matching a restriction together with their
+keywords, publications, source code, personnel, studies, study protocols and
+experiments. Each table is queried once for the whole batch, restricted to the
+matching projects on the server, and the rows are grouped in memory.
+"""
+
+import datetime
+import json
+
+from .. import project
+
+
+def _by_project(rows: list) -> dict:
+    """Group rows by project, removing the project attribute."""
+    grouped = dict()
+    for row in rows:
+        grouped.setdefault(row.pop("project"), []).append(row)
+    return grouped
+
+
+def project_dossiers(restriction=True) -> list:
+    """Fetch nested documents for all projects matching a restriction.
+
+    Args:
+        restriction (optional): Restriction on project.Project. Defaults to all
+            projects.
+
+    Returns:
+        list: One dictionary per project, in primary key order, with the
+            project.Project attributes and the lists `keywords`, `publications`,
+            `source_code`, `personnel` and `studies`. Each study lists its
+            `protocols` and `experiments`.
+    """
+    projects = project.Project & restriction
+    keys = projects.proj()
+
+    def fetch(table, *attributes):
+        return (table & keys).fetch(*attributes, as_dict=True, order_by="KEY")
+
+    keywords = _by_project(fetch(project.ProjectKeywords, "project", "keyword"))
+    publications = _by_project(
+        fetch(project.ProjectPublication, "project", "publication")
+    )
+    source_code = _by_project(fetch(project.ProjectSourceCode))
+    personnel = _by_project(
+        fetch(project.ProjectPersonnel * project._linking_module.User)
+    )
+    protocols = dict()
+    for row in fetch(project.Study.Protocol):
+        protocols.setdefault((row["project"], row["study"]), []).append(row["protocol"])
+    experiments = dict()
+    for row in fetch(project.Experiment):
+        experiments.setdefault((row["project"], row["study"]), []).append(row)
+    studies = _by_project(fetch(project.Study))
+    for name, project_studies in studies.items():
+        for study in project_studies:
+            study["protocols"] = protocols.get((name, study["study"]), [])
+            study["experiments"] = [
+                {k: v for k, v in row.items() if k not in ("project", "study")}
+                for row in experiments.get((name, study["study"]), [])
+            ]
+
+    dossiers = []
+    for row in projects.fetch(as_dict=True, order_by="KEY"):
+        name = row["project"]
+        row["keywords"] = [r["keyword"] for r in keywords.get(name, [])]
+        row["publications"] = [r["publication"] for r in publications.get(name, [])]
+        row["source_code"] = source_code.get(name, [])
+        row["personnel"] = personnel.get(name, [])
+        row["studies"] = studies.get(name, [])
+        dossiers.append(row)
+    return dossiers
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # NumPy scalar
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dossiers_to_json(dossiers: list) -> bytes:
+    """Serialize documents returned by `project_dossiers` to compact JSON.
+
+    Uses orjson when installed (`pip install orjson`), and the json module
+    otherwise.
+
+    Returns:
+        bytes: UTF-8 encoded JSON array.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(
+            dossiers, default=_json_default, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+    return orjson.dumps(
+        dossiers, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+def project_dossiers_json(restriction=True) -> bytes:
+    """`project_dossiers` serialized with `dossiers_to_json`."""
+    return dossiers_to_json(project_dossiers(restriction))
@@ -0,0 +1,139 @@
+"""Content hashes of the metadata exported to NWB, for incremental re-exports.
+
+`content_hashes` computes one hash per lab, project and protocol over all rows
+that feed `element_lab_to_nwb_dict` for that key, with one query per table.
+Save them with `write_manifest` after an export; `changed_keys` then lists the
+keys whose exported metadata changed since, so that only the sessions referring
+to them need to be exported again.
+
+Example:
+    ```python
+    changed = changed_keys("nwb_manifest.json")
+    sessions = Session & changed["protocol"]
+    ...  # re-export these sessions
+    write_manifest("nwb_manifest.json")
+    ```
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from .. import lab
+from .nwb import group_values, project_schema
+
+MANIFEST_FORMAT = 1
+KINDS = ("lab", "project", "protocol")
+
+
+def _hash(values) -> str:
+    return hashlib.blake2b(
+        json.dumps(values, sort_keys=True, default=str).encode(), digest_size=16
+    ).hexdigest()
+
+
+def _lab_hashes() -> dict:
+    organizations = group_values(
+        (lab.Lab.Organization * lab.Organization).fetch(
+            "lab", "org_name", as_dict=True
+        ),
+        ["lab"],
+        "org_name",
+    )
+    return {
+        name: _hash([lab_name, sorted(organizations.get((name,), []))])
+        for name, lab_name in zip(*lab.Lab.fetch("lab", "lab_name"))
+    }
+
+
+def _project_hashes() -> dict:
+    schema_module, description_attr = project_schema()
+    keywords, publications = (
+        group_values(table.fetch(as_dict=True), ["project"], attribute)
+        for table, attribute in (
+            (schema_module.ProjectKeywords, "keyword"),
+            (schema_module.ProjectPublication, "publication"),
+        )
+    )
+    return {
+        name: _hash(
+            [
+                description,
+                sorted(keywords.get((name,), [])),
+                sorted(publications.get((name,), [])),
+            ]
+        )
+        for name, description in zip(
+            *schema_module.Project.fetch("project", description_attr)
+        )
+    }
+
+
+def _protocol_hashes() -> dict:
+    return {
+        name: _hash([description])
+        for name, description in zip(
+            *lab.Protocol.fetch("protocol", "protocol_description")
+        )
+    }
+
+
+def content_hashes() -> dict:
+    """Hash the NWB metadata of every lab, project and protocol.
+
+    Returns:
+        dict: For each of 'lab', 'project' and 'protocol', the primary key value
+            of every entry mapped to the hash of its exported metadata.
+    """
+    return dict(
+        lab=_lab_hashes(), project=_project_hashes(), protocol=_protocol_hashes()
+    )
+
+
+def write_manifest(path: str, hashes: dict = None) -> dict:
+    """Write the content hashes to a JSON manifest.
+
+    Args:
+        path (str): Manifest file path.
+        hashes (dict, optional): Result of `content_hashes`, e.g., computed before
+            the export started. Defaults to the current hashes.
+
+    Returns:
+        dict: The manifest.
+    """
+    manifest = dict(
+        format=MANIFEST_FORMAT,
+        created=datetime.now(timezone.utc).isoformat(),
+        hashes=content_hashes() if hashes is None else hashes,
+    )
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def changed_keys(manifest) -> dict:
+    """List the keys whose NWB metadata changed since a manifest was written.
+
+    Args:
+        manifest (str | dict): Manifest file path, or a manifest returned by
+            `write_manifest`.
+
+    Returns:
+        dict: For each of 'lab', 'project' and 'protocol', the keys of entries
+            added or changed since the manifest, as restriction dictionaries.
+    """
+    if not isinstance(manifest, dict):
+        with open(manifest) as f:
+            manifest = json.load(f)
+    assert (
+        manifest.get("format") == MANIFEST_FORMAT
+    ), f"Unsupported manifest format {manifest.get('format')}."
+    current = content_hashes()
+    return {
+        kind: [
+            {kind: name}
+            for name, content_hash in sorted(current[kind].items())
+            if manifest["hashes"].get(kind, {}).get(name) != content_hash
+        ]
+        for kind in KINDS
+    }
@@ -1,12 +1,48 @@
 import logging
 
-from datajoint.errors import DataJointError
-
 from .. import lab, project
+from ..instrumentation import instrumented
+from .cache import memoize
 
 logger = logging.getLogger("datajoint")
 
+# Maximum number of keys in the restriction of one batched query
+RESTRICTION_CHUNK_SIZE = 1000
+
+
+def _fetch_single(query, message: str) -> dict:
+    """Fetch exactly one row, validating cardinality within the same query.
+
+    Args:
+        query (dj.expression.QueryExpression): Restricted query expected to
+            match one row.
+        message (str): Assertion message if zero or multiple rows match.
+
+    Returns:
+        dict: The matched row.
+    """
+    rows = query.fetch(as_dict=True, limit=2)
+    assert len(rows) == 1, message
+    return rows[0]
+
+
+def project_schema() -> tuple:
+    """Resolve which Project tables feed the NWB export.
+
+    The choice follows schema activation: once `element_lab.project` is activated,
+        its tables are used, otherwise the deprecated `lab.Project` tables are. No
+        query is issued.
 
+    Returns:
+        tuple: (module with the Project tables, attribute describing the project)
+    """
+    if project.schema.is_activated():
+        return project, "project_title"
+    return lab, "project_description"
+
+
+@instrumented("export.nwb._lab_to_nwb_dict")
+@memoize
 def _lab_to_nwb_dict(lab_key: dict) -> dict:
     """Generate a dictionary containing all relevant lab and institution info.
 
@@ -16,49 +52,48 @@ def _lab_to_nwb_dict(lab_key: dict) -> dict:
     Returns:
         dict: Dictionary with NWB parameters.
     """
-    lab_info = (lab.Lab * lab.Lab.Organization * lab.Organization & lab_key).fetch1()
+    lab_info = _fetch_single(
+        lab.Lab * lab.Lab.Organization * lab.Organization & lab_key,
+        "Multiple labs error! The lab_key should specify only one lab.",
+    )
     return dict(
         institution=lab_info.get("org_name"),
         lab=lab_info.get("lab_name"),
     )
 
 
+@instrumented("export.nwb._project_to_nwb_dict")
+@memoize
 def _project_to_nwb_dict(project_key: dict) -> dict:
     """Generate a dictionary object containing relevant project information
         (e.g., experimental description, related publications, etc.).
 
     Args:
-        project_key (dict): Key specifying one entry in element_lab.lab.Project
+        project_key (dict): Key specifying one entry in element_lab.project.Project,
+            or in element_lab.lab.Project if the project schema is not activated
 
     Returns:
         dict: Dictionary with NWB parameters.
     """
-
-    try:  # if using project schema (not lab.Project), fetch1 will DataJointError
-        project_info = (lab.Project & project_key).fetch1()
-        return dict(
-            experiment_description=project_info.get("project_description"),
-            keywords=(lab.ProjectKeywords() & project_key).fetch("keyword").tolist()
-            or None,
-            related_publications=(lab.ProjectPublication() & project_key)
-            .fetch("publication")
-            .tolist()
-            or None,
-        )
-    except DataJointError:
-        return dict(
-            experiment_description=(project.Project & project_key).fetch1(
-                "project_title"
-            ),
-            keywords=(project.ProjectKeywords & project_key).fetch("keyword").tolist()
-            or None,
-            related_publications=(project.ProjectPublication() & project_key)
-            .fetch("publication")
-            .tolist()
-            or None,
-        )
+    schema_module, description_attr = project_schema()
+    project_info = _fetch_single(
+        schema_module.Project & project_key,
+        "Multiple projects error! The project_key should specify only one project.",
+    )
+    project_key = {k: project_info[k] for k in schema_module.Project.primary_key}
+    return dict(
+        experiment_description=project_info.get(description_attr),
+        keywords=(schema_module.ProjectKeywords & project_key).fetch("keyword").tolist()
+        or None,
+        related_publications=(schema_module.ProjectPublication & project_key)
+        .fetch("publication")
+        .tolist()
+        or None,
+    )
 
 
+@instrumented("export.nwb._protocol_to_nwb_dict")
+@memoize
 def _protocol_to_nwb_dict(protocol_key: dict) -> dict:
     """Generate a dictionary object containing all protocol title and notes.
 
@@ -68,14 +103,17 @@ def _protocol_to_nwb_dict(protocol_key: dict) -> dict:
     Returns:
         dict: Dictionary with NWB parameters.
     """
-
-    protocol_info = (lab.Protocol & protocol_key).fetch1()
+    protocol_info = _fetch_single(
+        lab.Protocol & protocol_key,
+        "Multiple protocols error! The protocol_key should specify only one protocol.",
+    )
     return dict(
         protocol=protocol_info.get("protocol"),
         notes=protocol_info.get("protocol_description"),
     )
 
 
+@instrumented("export.nwb.element_lab_to_nwb_dict")
 def element_lab_to_nwb_dict(
     lab_key: dict = None, project_key: dict = None, protocol_key: dict = None
 ) -> dict:
@@ -87,25 +125,16 @@ def element_lab_to_nwb_dict(
 
     Args:
         lab_key (dict, optional): Key specifying one entry in element_lab.lab.Lab
-        project_key (dict, optional): Key specifying one entry in element_lab.lab.Project
+        project_key (dict, optional): Key specifying one entry in
+            element_lab.project.Project, or in element_lab.lab.Project if the
+            project schema is not activated
         protocol_key (dict, optional): Key specifying one entry in element_lab.lab.Protocol
 
     Returns:
         dict: Dictionary with NWB parameters.
     """
-    # Validate input
+    # Validate input; each key's cardinality is checked when its row is fetched
     assert any([lab_key, project_key, protocol_key]), "Must specify one key."
-    assert (
-        lab_key is None or len(lab.Lab & lab_key) == 1
-    ), "Multiple labs error! The lab_key should specify only one lab."
-    assert (
-        project_key is None
-        or len(lab.Project & project_key) == 1
-        or len(project.Project & project_key) == 1
-    ), "Multiple projects error! The project_key should specify only one project."
-    assert (
-        protocol_key is None or len(lab.Protocol & protocol_key) == 1
-    ), "Multiple protocols error! The protocol_key should specify only one protocol."
 
     element_info = dict()
     if lab_key:
@@ -116,3 +145,230 @@ def element_lab_to_nwb_dict(
         element_info.update(_protocol_to_nwb_dict(protocol_key))
 
     return element_info
+
+
+class _RowIndex:
+    """Fetched rows, indexed on demand by the attributes that keys restrict.
+
+    Args:
+        rows (list): Fetched row dictionaries.
+        primary_key (list): Primary key attribute names of the fetched table.
+    """
+
+    def __init__(self, rows: list, primary_key: list):
+        self.rows = rows
+        self.primary_key = tuple(primary_key)
+        self._attributes = set(rows[0]) if rows else set()
+        self._groups = dict()  # grouping attributes -> {values: rows}
+
+    def match(self, key: dict) -> list:
+        """Return the rows that a restriction by `key` would have selected.
+
+        Mirrors DataJoint dict restriction: attributes of `key` that are not in the
+        table heading are ignored.
+        """
+        attributes = tuple(sorted(k for k in key if k in self._attributes))
+        group_by = (
+            self.primary_key if set(self.primary_key) <= set(attributes) else attributes
+        )
+        groups = self._groups.get(group_by)
+        if groups is None:
+            groups = self._groups[group_by] = dict()
+            for row in self.rows:
+                groups.setdefault(tuple(row[k] for k in group_by), []).append(row)
+        rows = groups.get(tuple(key[k] for k in group_by), [])
+        return [row for row in rows if all(row[k] == key[k] for k in attributes)]
+
+
+def _distinct_keys(query, keys: list) -> list:
+    """Keys projected on the heading of `query`, without duplicates."""
+    names = set(query.heading.names)
+    distinct = dict()
+    for key in keys:
+        key = {k: v for k, v in key.items() if k in names}
+        distinct.setdefault(tuple(sorted(key.items())), key)
+    return list(distinct.values())
+
+
+def _fetch_grouped(query, keys: list, primary_key: list = None) -> _RowIndex:
+    """Fetch all rows of `query` restricted by any of `keys`.
+
+    Duplicate keys are removed and the remaining ones are sent in chunks of
+        `RESTRICTION_CHUNK_SIZE`, with one query per chunk, to bound the size of
+        the restriction.
+
+    Args:
+        query (dj.expression.QueryExpression): Query to restrict.
+        keys (list): List of restriction dictionaries.
+        primary_key (list, optional): Attributes identifying the entries the keys
+            select. Defaults to the primary key of `query`.
+
+    Returns:
+        _RowIndex: The fetched rows.
+    """
+    primary_key = primary_key or query.primary_key
+    keys = _distinct_keys(query, keys) if keys else []
+    if any(not key for key in keys):
+        keys = [dict()]  # an empty restriction selects all rows
+    rows = []
+    for start in range(0, len(keys), RESTRICTION_CHUNK_SIZE):
+        rows.extend(
+            (query & keys[start : start + RESTRICTION_CHUNK_SIZE]).fetch(as_dict=True)
+        )
+    if len(keys) > RESTRICTION_CHUNK_SIZE:  # rows matching keys of several chunks
+        rows = list(
+            {tuple(row[k] for k in query.primary_key): row for row in rows}.values()
+        )
+    return _RowIndex(rows, primary_key)
+
+
+def group_values(rows: list, primary_key: list, attribute: str) -> dict:
+    """Group the values of one attribute by the (parent) primary key values."""
+    grouped = dict()
+    for row in rows:
+        grouped.setdefault(tuple(row[k] for k in primary_key), []).append(
+            row[attribute]
+        )
+    return grouped
+
+
+def _labs_to_nwb_dicts(lab_keys: list) -> list:
+    """Batched version of `_lab_to_nwb_dict` using one query for all keys.
+
+    Args:
+        lab_keys (list): Keys each specifying one entry in element_lab.lab.Lab
+
+    Returns:
+        list: One dictionary with NWB parameters per key.
+    """
+    query = lab.Lab * lab.Lab.Organization * lab.Organization
+    index = _fetch_grouped(query, lab_keys, lab.Lab.primary_key)
+    nwb_dicts = []
+    for lab_key in lab_keys:
+        matched = index.match(lab_key)
+        assert (
+            len(matched) == 1
+        ), "Multiple labs error! The lab_key should specify only one lab."
+        nwb_dicts.append(
+            dict(
+                institution=matched[0].get("org_name"),
+                lab=matched[0].get("lab_name"),
+            )
+        )
+    return nwb_dicts
+
+
+def _projects_to_nwb_dicts(project_keys: list) -> list:
+    """Batched version of `_project_to_nwb_dict` using one query per table.
+
+    Args:
+        project_keys (list): Keys each specifying one entry in the Project table
+            resolved by `project_schema`
+
+    Returns:
+        list: One dictionary with NWB parameters per key.
+    """
+    schema_module, description_attr = project_schema()
+    primary_key = schema_module.Project.primary_key
+    index = _fetch_grouped(schema_module.Project, project_keys)
+    projects = []
+    for project_key in project_keys:
+        matched = index.match(project_key)
+        assert (
+            len(matched) == 1
+        ), "Multiple projects error! The project_key should specify only one project."
+        projects.append(matched[0])
+
+    resolved_keys = [{k: row[k] for k in primary_key} for row in projects]
+    keywords = group_values(
+        _fetch_grouped(schema_module.ProjectKeywords, resolved_keys).rows,
+        primary_key,
+        "keyword",
+    )
+    publications = group_values(
+        _fetch_grouped(schema_module.ProjectPublication, resolved_keys).rows,
+        primary_key,
+        "publication",
+    )
+    nwb_dicts = []
+    for project_info in projects:
+        project_id = tuple(project_info[k] for k in primary_key)
+        nwb_dicts.append(
+            dict(
+                experiment_description=project_info.get(description_attr),
+                keywords=keywords.get(project_id) or None,
+                related_publications=publications.get(project_id) or None,
+            )
+        )
+    return nwb_dicts
+
+
+def _protocols_to_nwb_dicts(protocol_keys: list) -> list:
+    """Batched version of `_protocol_to_nwb_dict` using one query for all keys.
+
+    Args:
+        protocol_keys (list): Keys each specifying one entry in element_lab.lab.Protocol
+
+    Returns:
+        list: One dictionary with NWB parameters per key.
+    """
+    index = _fetch_grouped(lab.Protocol, protocol_keys)
+    nwb_dicts = []
+    for protocol_key in protocol_keys:
+        matched = index.match(protocol_key)
+        assert (
+            len(matched) == 1
+        ), "Multiple protocols error! The protocol_key should specify only one protocol."
+        nwb_dicts.append(
+            dict(
+                protocol=matched[0].get("protocol"),
+                notes=matched[0].get("protocol_description"),
+            )
+        )
+    return nwb_dicts
+
+
+@instrumented("export.nwb.element_lab_to_nwb_dicts")
+def element_lab_to_nwb_dicts(
+    lab_keys: list = None, project_keys: list = None, protocol_keys: list = None
+) -> list:
+    """Generate NWB-compliant dictionaries of lab metadata for many sessions at once
+
+    Batched counterpart of `element_lab_to_nwb_dict`. Rather than querying the
+       database for each session, the distinct keys of one type are fetched with
+       one set-restricted query per table and per `RESTRICTION_CHUNK_SIZE` keys,
+       and the results are grouped in Python.
+       Lists that are given must have the same length, with the i-th elements
+       describing the i-th session. A `None` element skips that type for a session.
+
+    Args:
+        lab_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Lab
+        project_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Project or element_lab.project.Project
+        protocol_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Protocol
+
+    Returns:
+        list: One dictionary with NWB parameters per session.
+    """
+    key_lists = [k for k in (lab_keys, project_keys, protocol_keys) if k is not None]
+    assert key_lists, "Must specify one list of keys."
+    n_sessions = len(key_lists[0])
+    assert all(
+        len(k) == n_sessions for k in key_lists
+    ), "Lists of keys must all have the same length."
+
+    element_infos = [dict() for _ in range(n_sessions)]
+    for keys, batch_function in (
+        (lab_keys, _labs_to_nwb_dicts),
+        (project_keys, _projects_to_nwb_dicts),
+        (protocol_keys, _protocols_to_nwb_dicts),
+    ):
+        if keys is None:
+            continue
+        indices = [i for i, key in enumerate(keys) if key]
+        for i, nwb_dict in zip(indices, batch_function([keys[i] for i in indices])):
+            element_infos[i].update(nwb_dict)
+
+    return element_infos
@@ -0,0 +1,154 @@
+"""Write lab metadata into existing NWB files in place.
+
+`backfill_nwb_files` adds the fields of `element_lab_to_nwb_dict` (institution, lab,
+experiment description, keywords, related publications, protocol and notes) to the
+`/general` group of NWB files that already exist. Only these small datasets are
+written, so the acquired data is neither read nor rewritten. Replaced fields leave
+their previous few bytes unused in the file until it is repacked with `h5repack`.
+
+The metadata is fetched in the calling process, once per distinct key, with the
+batched queries of `element_lab_to_nwb_dicts`. The files are then updated in a
+process pool that does not connect to the database.
+
+Requires h5py: `pip install h5py`.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import h5py
+except ImportError:
+    raise ImportError(
+        "element_lab.export.nwb_files requires h5py: pip install h5py"
+    ) from None
+
+from .nwb import element_lab_to_nwb_dicts
+from .parallel import _session_keys
+
+logger = logging.getLogger("datajoint")
+
+# Fields of `element_lab_to_nwb_dict`, all stored in the /general group
+NWB_FIELDS = (
+    "institution",
+    "lab",
+    "experiment_description",
+    "keywords",
+    "related_publications",
+    "protocol",
+    "notes",
+)
+
+
+def _key_id(key: dict) -> tuple:
+    return tuple(sorted(key.items()))
+
+
+def _distinct_nwb_dicts(keys: list, argument: str) -> list:
+    """NWB dictionaries for `keys`, querying each distinct key once."""
+    distinct = {_key_id(key): key for key in keys if key}
+    if not distinct:
+        return [dict() for _ in keys]
+    nwb_dicts = dict(
+        zip(distinct, element_lab_to_nwb_dicts(**{argument: list(distinct.values())}))
+    )
+    return [nwb_dicts[_key_id(key)] if key else dict() for key in keys]
+
+
+def _stored_value(dataset):
+    """Value of a string dataset, or None if it is not a string dataset."""
+    try:
+        value = dataset.asstr()[()]
+    except TypeError:
+        return None
+    return value.tolist() if hasattr(value, "tolist") else value
+
+
+def _write_nwb_fields(path: str, fields: dict, overwrite: bool) -> dict:
+    """Write string fields into the /general group of one NWB file.
+
+    Runs in the worker processes; errors are reported rather than raised so that
+    one unreadable file does not stop the backfill.
+    """
+    report = dict(path=str(path), written=[], skipped=[], error=None)
+    try:
+        with h5py.File(path, "r+") as f:
+            if "nwb_version" not in f.attrs:
+                raise ValueError("not an NWB file (no nwb_version attribute)")
+            general = f.require_group("general")
+            for name, value in fields.items():
+                if name in general:
+                    if not overwrite or _stored_value(general[name]) == value:
+                        report["skipped"].append(name)
+                        continue
+                    del general[name]
+                general.create_dataset(name, data=value, dtype=h5py.string_dtype())
+                report["written"].append(name)
+    except Exception as error:
+        report["error"] = f"{type(error).__name__}: {error}"
+    return report
+
+
+def backfill_nwb_files(
+    paths: list,
+    lab_keys: list = None,
+    project_keys: list = None,
+    protocol_keys: list = None,
+    overwrite: bool = True,
+    max_workers: int = None,
+) -> list:
+    """Write lab metadata into existing NWB files in place.
+
+    The lists of keys that are given must have the same length as `paths`, with
+        the i-th elements describing the i-th file. A `None` element skips that type
+        for a file.
+
+    Args:
+        paths (list): Paths of the NWB files.
+        lab_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Lab
+        project_keys (list, optional): Keys each specifying one entry in a
+            Project table
+        protocol_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Protocol
+        overwrite (bool): When True (default), replace fields already present in a
+            file; otherwise keep them. Fields already holding the same value are
+            never rewritten.
+        max_workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs; 1 updates the files in the calling process.
+
+    Returns:
+        list: One dictionary per file, in input order, with its path, the lists of
+            `written` and `skipped` fields and an `error` message or None.
+    """
+    sessions = _session_keys(lab_keys, project_keys, protocol_keys)
+    assert len(sessions) == len(paths), "Lists of keys must have one key per path."
+
+    fields = [dict() for _ in paths]
+    for keys, argument in (
+        (lab_keys, "lab_keys"),
+        (project_keys, "project_keys"),
+        (protocol_keys, "protocol_keys"),
+    ):
+        if keys is None:
+            continue
+        for file_fields, nwb_dict in zip(fields, _distinct_nwb_dicts(keys, argument)):
+            file_fields.update(
+                {k: v for k, v in nwb_dict.items() if k in NWB_FIELDS and v is not None}
+            )
+
+    arguments = (paths, fields, [overwrite] * len(paths))
+    if max_workers == 1:
+        reports = list(map(_write_nwb_fields, *arguments))
+    else:
+        max_workers = max_workers or os.cpu_count() or 1
+        chunk_size = max(1, len(paths) // (4 * max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            reports = list(
+                pool.map(_write_nwb_fields, *arguments, chunksize=chunk_size)
+            )
+    for report in reports:
+        if report["error"]:
+            logger.warning(f"Could not update {report['path']}: {report['error']}")
+    return reports
@@ -0,0 +1,90 @@
+"""Concurrent NWB metadata export with a thread pool or asyncio.
+
+Lookups for different sessions are independent and bound by round-trip latency,
+so they are overlapped in worker threads, each using its own database connection
+(see `element_lab.connection`). Results are returned in the order of the keys.
+"""
+
+import asyncio
+import functools
+
+from ..connection import connection_executor
+from .nwb import element_lab_to_nwb_dict
+
+
+def _session_keys(lab_keys, project_keys, protocol_keys) -> list:
+    """Zip the lists of keys into (lab_key, project_key, protocol_key) per session."""
+    key_lists = [k for k in (lab_keys, project_keys, protocol_keys) if k is not None]
+    assert key_lists, "Must specify one list of keys."
+    n_sessions = len(key_lists[0])
+    assert all(
+        len(k) == n_sessions for k in key_lists
+    ), "Lists of keys must all have the same length."
+    return list(
+        zip(
+            lab_keys or [None] * n_sessions,
+            project_keys or [None] * n_sessions,
+            protocol_keys or [None] * n_sessions,
+        )
+    )
+
+
+def element_lab_to_nwb_dicts_threaded(
+    lab_keys: list = None,
+    project_keys: list = None,
+    protocol_keys: list = None,
+    max_workers: int = 8,
+) -> list:
+    """Run `element_lab_to_nwb_dict` for many sessions in a thread pool.
+
+    Args:
+        lab_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Lab
+        project_keys (list, optional): Keys each specifying one entry in a
+            Project table
+        protocol_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Protocol
+        max_workers (int): Maximum number of concurrent lookups and connections.
+
+    Returns:
+        list: One dictionary with NWB parameters per session, in input order.
+    """
+    sessions = _session_keys(lab_keys, project_keys, protocol_keys)
+    with connection_executor(max_workers) as pool:
+        return list(pool.map(lambda keys: element_lab_to_nwb_dict(*keys), sessions))
+
+
+async def element_lab_to_nwb_dicts_async(
+    lab_keys: list = None,
+    project_keys: list = None,
+    protocol_keys: list = None,
+    max_concurrency: int = 8,
+) -> list:
+    """Asynchronous counterpart of `element_lab_to_nwb_dicts_threaded`.
+
+    The blocking lookups run in a dedicated thread pool, so the event loop stays
+        responsive while at most `max_concurrency` lookups are in flight.
+
+    Args:
+        lab_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Lab
+        project_keys (list, optional): Keys each specifying one entry in a
+            Project table
+        protocol_keys (list, optional): Keys each specifying one entry in
+            element_lab.lab.Protocol
+        max_concurrency (int): Maximum number of concurrent lookups and connections.
+
+    Returns:
+        list: One dictionary with NWB parameters per session, in input order.
+    """
+    sessions = _session_keys(lab_keys, project_keys, protocol_keys)
+    loop = asyncio.get_running_loop()
+    with connection_executor(max_concurrency) as pool:
+        return await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, functools.partial(element_lab_to_nwb_dict, *keys)
+                )
+                for keys in sessions
+            )
+        )
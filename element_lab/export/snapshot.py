@@ -0,0 +1,261 @@
+"""Offline columnar snapshots of the `lab` and `project` schemas.
+
+`write_snapshot` streams every element_lab table, including part tables, into one
+Arrow IPC file per table under a versioned directory. `Snapshot` memory-maps these
+files and produces the same dictionaries as `element_lab.export.nwb` without a
+database connection, e.g., on compute nodes that cannot reach the server.
+
+Requires pyarrow: `pip install pyarrow`.
+"""
+
+import json
+import logging
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+except ImportError:
+    raise ImportError(
+        "element_lab.export.snapshot requires pyarrow: pip install pyarrow"
+    ) from None
+
+from .. import lab, project
+from ..utils import after_key, element_lab_tables
+
+logger = logging.getLogger("datajoint")
+
+SNAPSHOT_FORMAT = 1
+_LATEST = "LATEST"
+_MANIFEST = "manifest.json"
+
+
+def _arrow_type(attribute) -> pa.DataType:
+    """Map a DataJoint attribute to the Arrow type used in the snapshot."""
+    sql_type = attribute.type.lower()
+    if sql_type == "date":
+        return pa.date32()
+    if sql_type.startswith(("datetime", "timestamp")):
+        return pa.timestamp("us")
+    if attribute.numeric:
+        return pa.int64() if "int" in sql_type else pa.float64()
+    return pa.string()
+
+
+def _write_table(table, path: Path, chunk_size: int) -> int:
+    """Stream one table to an Arrow IPC file in primary-key order.
+
+    Chunks are selected by keyset pagination, restricting each query to the rows
+    after the last primary key fetched, so that every chunk is an index range scan.
+    """
+    heading = table.heading
+    schema = pa.schema(
+        [
+            pa.field(name, _arrow_type(attribute))
+            for name, attribute in heading.attributes.items()
+        ]
+    )
+    primary_key = table.primary_key
+    n_rows = 0
+    query = table
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        while True:
+            rows = query.fetch(
+                *heading.names, as_dict=True, order_by="KEY", limit=chunk_size
+            )
+            if not rows:
+                break
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            n_rows += len(rows)
+            if len(rows) < chunk_size:
+                break
+            query = table & after_key(primary_key, [rows[-1][k] for k in primary_key])
+    return n_rows
+
+
+def write_snapshot(root: str, version: str = None, chunk_size: int = 10000) -> Path:
+    """Write a versioned snapshot of all activated element_lab tables.
+
+    All tables are read in one transaction started with `START TRANSACTION WITH
+    CONSISTENT SNAPSHOT`, so the snapshot reflects a single point in time even while
+    other clients write. It is written to a temporary directory and renamed when
+    complete, so readers never observe a partial snapshot. `root/LATEST` then names
+    the newest version.
+
+    Args:
+        root (str): Directory holding all snapshot versions.
+        version (str, optional): Name of this version. Defaults to a UTC timestamp.
+        chunk_size (int): Number of rows fetched per query while streaming.
+
+    Returns:
+        Path: Directory of the new snapshot.
+    """
+    root = Path(root)
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    target = root / version
+    assert not target.exists(), f"Snapshot version {version} already exists."
+    staging = root / f".{version}.tmp"
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    modules = [m for m in (lab, project) if m.schema.is_activated()]
+    manifest = dict(
+        format=SNAPSHOT_FORMAT,
+        version=version,
+        created=datetime.now(timezone.utc).isoformat(),
+        schemas={m.__name__.rsplit(".", 1)[-1]: m.schema.database for m in modules},
+        tables=dict(),
+    )
+    with lab.schema.connection.transaction:  # one consistent read view
+        for name, table in element_lab_tables(tuple(modules)).items():
+            n_rows = _write_table(table(), staging / f"{name}.arrow", chunk_size)
+            manifest["tables"][name] = dict(rows=n_rows, file=f"{name}.arrow")
+            logger.info(f"Snapshot {version}: {name} ({n_rows} rows)")
+
+    with open(staging / _MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    staging.rename(target)
+    (root / _LATEST).write_text(version)
+    return target
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot written by `write_snapshot`.
+
+    Args:
+        root (str): Directory holding all snapshot versions.
+        version (str, optional): Version to open. Defaults to the latest version.
+    """
+
+    def __init__(self, root: str, version: str = None):
+        root = Path(root)
+        self.version = version or (root / _LATEST).read_text().strip()
+        self.path = root / self.version
+        with open(self.path / _MANIFEST) as f:
+            self.manifest = json.load(f)
+        assert (
+            self.manifest["format"] == SNAPSHOT_FORMAT
+        ), f"Unsupported snapshot format {self.manifest['format']}."
+        self._tables = dict()
+        self._indexes = dict()  # (table, attributes) -> {values: row numbers}
+
+    def table(self, name: str) -> pa.Table:
+        """Return a table, e.g., 'lab.Lab.Organization', memory-mapped from disk."""
+        if name not in self._tables:
+            assert name in self.manifest["tables"], f"{name} is not in the snapshot."
+            source = pa.memory_map(
+                str(self.path / self.manifest["tables"][name]["file"]), "r"
+            )
+            self._tables[name] = pa.ipc.open_file(source).read_all()
+        return self._tables[name]
+
+    def restrict(self, name: str, key: dict) -> pa.Table:
+        """Restrict a table by a key. As in DataJoint, attributes not in the table
+        are ignored.
+
+        Rows are looked up in an index of the table by the restricted attributes,
+        built on first use.
+        """
+        table = self.table(name)
+        attributes = tuple(sorted(k for k in key if k in table.column_names))
+        if not attributes:
+            return table
+        index = self._indexes.get((name, attributes))
+        if index is None:
+            index = self._indexes[(name, attributes)] = dict()
+            columns = [table[attr].to_pylist() for attr in attributes]
+            for row_number, values in enumerate(zip(*columns)):
+                index.setdefault(values, []).append(row_number)
+        rows = index.get(tuple(key[attr] for attr in attributes), [])
+        return table.take(pa.array(rows, type=pa.int64()))
+
+    def _fetch_single(self, name: str, key: dict, message: str) -> dict:
+        rows = self.restrict(name, key).slice(0, 2).to_pylist()
+        assert len(rows) == 1, message
+        return rows[0]
+
+    def _lab_to_nwb_dict(self, lab_key: dict) -> dict:
+        lab_info = self._fetch_single(
+            "lab.Lab",
+            lab_key,
+            "Multiple labs error! The lab_key should specify only one lab.",
+        )
+        # as the database export, which restricts Lab * Lab.Organization *
+        # Organization by lab_key, e.g., to select one organization of the lab
+        organizations = self.restrict("lab.Lab.Organization", {**lab_info, **lab_key})
+        assert (
+            organizations.num_rows == 1
+        ), "Multiple labs error! The lab_key should specify only one lab."
+        org_info = self._fetch_single(
+            "lab.Organization",
+            {**organizations.to_pylist()[0], **lab_key},
+            "Multiple labs error! The lab_key should specify only one lab.",
+        )
+        return dict(
+            institution=org_info.get("org_name"),
+            lab=lab_info.get("lab_name"),
+        )
+
+    def _project_to_nwb_dict(self, project_key: dict) -> dict:
+        if "project.Project" in self.manifest["tables"]:
+            schema_name, description_attr = "project", "project_title"
+        else:
+            schema_name, description_attr = "lab", "project_description"
+        project_info = self._fetch_single(
+            f"{schema_name}.Project",
+            project_key,
+            "Multiple projects error! The project_key should specify only one project.",
+        )
+        project_key = dict(project=project_info["project"])
+        return dict(
+            experiment_description=project_info.get(description_attr),
+            keywords=self.restrict(f"{schema_name}.ProjectKeywords", project_key)[
+                "keyword"
+            ].to_pylist()
+            or None,
+            related_publications=self.restrict(
+                f"{schema_name}.ProjectPublication", project_key
+            )["publication"].to_pylist()
+            or None,
+        )
+
+    def _protocol_to_nwb_dict(self, protocol_key: dict) -> dict:
+        protocol_info = self._fetch_single(
+            "lab.Protocol",
+            protocol_key,
+            "Multiple protocols error! The protocol_key should specify only one protocol.",
+        )
+        return dict(
+            protocol=protocol_info.get("protocol"),
+            notes=protocol_info.get("protocol_description"),
+        )
+
+    def element_lab_to_nwb_dict(
+        self, lab_key: dict = None, project_key: dict = None, protocol_key: dict = None
+    ) -> dict:
+        """Generate the same dictionary as `element_lab.export.element_lab_to_nwb_dict`
+        from the snapshot instead of the database.
+
+        Args:
+            lab_key (dict, optional): Key specifying one entry in element_lab.lab.Lab
+            project_key (dict, optional): Key specifying one entry in the Project
+                table of the snapshot
+            protocol_key (dict, optional): Key specifying one entry in
+                element_lab.lab.Protocol
+
+        Returns:
+            dict: Dictionary with NWB parameters.
+        """
+        assert any([lab_key, project_key, protocol_key]), "Must specify one key."
+
+        element_info = dict()
+        if lab_key:
+            element_info.update(self._lab_to_nwb_dict(lab_key))
+        if project_key:
+            element_info.update(self._project_to_nwb_dict(project_key))
+        if protocol_key:
+            element_info.update(self._protocol_to_nwb_dict(protocol_key))
+
+        return element_info
@@ -0,0 +1,187 @@
+"""Opt-in instrumentation of element_lab operations.
+
+While enabled, every element_lab entry point (schema activation, the
+`export.nwb` functions, and `fetch`, `fetch1` and `insert` on element_lab tables)
+is recorded as an `OperationStats` with the number of database round trips, rows
+returned or affected, and wall time. Queries count towards all operations in
+progress, so nested operations are included in the totals of the outer ones.
+Operations in progress are carried over to the workers of
+`connection.connection_executor`.
+
+Example:
+    ```python
+    from element_lab import instrumentation
+
+    instrumentation.register_callback(lambda stats: print(stats.as_dict()))
+    with instrumentation.collect() as records:
+        element_lab_to_nwb_dict(lab_key=lab_key)
+    ```
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import datajoint as dj
+
+from .utils import add_table_method_hook, remove_table_method_hook
+
+logger = logging.getLogger("datajoint")
+
+TABLE_METHODS = ("fetch", "fetch1", "insert")
+
+
+class OperationStats:
+    """Resources used by one element_lab operation.
+
+    Attributes:
+        operation (str): Name of the operation, e.g., 'lab.User.fetch'.
+        queries (int): Number of database round trips.
+        rows (int): Number of rows returned or affected by the queries.
+        seconds (float): Wall time.
+    """
+
+    __slots__ = ("operation", "queries", "rows", "seconds")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (
+            f"OperationStats({self.operation}: {self.queries} queries,"
+            f" {self.rows} rows, {self.seconds * 1000:.1f} ms)"
+        )
+
+
+_enabled = 0  # number of active enable_instrumentation calls and collect blocks
+_callbacks = []
+_active = contextvars.ContextVar("element_lab_operations", default=())
+_original_query = None
+_stats_lock = threading.Lock()  # operations may span worker threads
+
+
+def _counting_query(self, query, args=(), **kwargs):
+    """Replacement of `dj.Connection.query` counting round trips while active."""
+    cursor = _original_query(self, query, args=args, **kwargs)
+    operations = _active.get()
+    if operations:
+        # rows returned by buffered cursors or affected by changes; -1 if unknown
+        rows = max(getattr(cursor, "rowcount", 0), 0)
+        with _stats_lock:
+            for stats in operations:
+                stats.queries += 1
+                stats.rows += rows
+    return cursor
+
+
+@contextmanager
+def operation(name: str):
+    """Record the queries issued within the block as operation `name`.
+
+    Yields:
+        OperationStats: Statistics of the operation, or None if disabled.
+    """
+    if not _enabled:
+        yield None
+        return
+    stats = OperationStats(name)
+    token = _active.set(_active.get() + (stats,))
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.seconds = time.perf_counter() - start
+        _active.reset(token)
+        for callback in list(_callbacks):
+            try:
+                callback(stats)
+            except Exception:
+                logger.exception(f"Instrumentation callback {callback!r} failed")
+
+
+def _table_operation(table_name: str, method_name: str):
+    return operation(f"{table_name}.{method_name}")
+
+
+def instrumented(name: str):
+    """Decorate an element_lab entry point to record it as operation `name`."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with operation(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_callback(callback):
+    """Call `callback(stats)` with the `OperationStats` of each finished operation.
+
+    Returns:
+        callable: The callback, so that this function can be used as a decorator.
+    """
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+    return callback
+
+
+def unregister_callback(callback):
+    """Stop calling a callback added with `register_callback`."""
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+
+def enable_instrumentation():
+    """Start recording element_lab operations. Calls may be nested."""
+    global _enabled, _original_query
+    if not _enabled:
+        if _original_query is None:
+            _original_query = dj.Connection.query
+        dj.Connection.query = _counting_query
+        for method_name in TABLE_METHODS:
+            add_table_method_hook(method_name, _table_operation)
+    _enabled += 1
+
+
+def disable_instrumentation():
+    """Stop recording once every `enable_instrumentation` call has been undone."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled -= 1
+    if not _enabled:
+        dj.Connection.query = _original_query
+        for method_name in TABLE_METHODS:
+            remove_table_method_hook(method_name, _table_operation)
+
+
+@contextmanager
+def collect():
+    """Enable instrumentation within the block and collect all operations.
+
+    Yields:
+        list: `OperationStats` of the operations finished within the block, in
+            order of completion.
+    """
+    records = []
+    register_callback(records.append)
+    enable_instrumentation()
+    try:
+        yield records
+    finally:
+        disable_instrumentation()
+        unregister_callback(records.append)
@@ -1,13 +1,26 @@
 import logging
+import sys
 
 import datajoint as dj
 
+from .declaration import activate_fast
+from .instrumentation import instrumented
+
 logger = logging.getLogger("datajoint")
 
 schema = dj.Schema()
 
+_activating = False
+_deprecation_warned = False
+
 
-def activate(schema_name: str, create_schema: bool = True, create_tables: bool = True):
+@instrumented("lab.activate")
+def activate(
+    schema_name: str,
+    create_schema: bool = True,
+    create_tables: bool = True,
+    fast: bool = False,
+):
     """Activate this schema
 
     Args:
@@ -16,11 +29,40 @@ def activate(schema_name: str, create_schema: bool = True, create_tables: bool =
                             does not yet exist.
         create_tables (bool): when True (default), create schema tables in the database
                              if they do not yet exist.
+        fast (bool): when True, skip table declaration if the table definitions match
+                     those stored at the last declaration, and prefetch all table
+                     headings in bulk. See `element_lab.declaration`.
     """
-
-    schema.activate(
-        schema_name, create_schema=create_schema, create_tables=create_tables
-    )
+    global _activating
+    _activating = True  # declaring deprecated tables is not a use of them
+    try:
+        if fast:
+            activate_fast(
+                sys.modules[__name__],
+                schema_name,
+                create_schema=create_schema,
+                create_tables=create_tables,
+            )
+        else:
+            schema.activate(
+                schema_name, create_schema=create_schema, create_tables=create_tables
+            )
+    finally:
+        _activating = False
+
+
+class _Deprecated:
+    """Mixin for deprecated tables that logs a warning on their first use."""
+
+    def __init__(self, *args, **kwargs):
+        global _deprecation_warned
+        if not (_activating or _deprecation_warned):
+            _deprecation_warned = True
+            logger.warning(
+                "lab.Project and related tables will be removed in a future version of"
+                + " Element Lab. Please use the project schema."
+            )
+        super().__init__(*args, **kwargs)
 
 
 @schema
@@ -118,6 +160,7 @@ class User(dj.Lookup):
     user_email=''       : varchar(128)
     user_cellphone=''   : varchar(32)
     user_fullname=''    : varchar(64)  # Full name used to uniquely identify an individual
+    index(user_email)
     """
 
 
@@ -171,7 +214,7 @@ class Protocol(dj.Lookup):
 
 
 @schema
-class Project(dj.Lookup):
+class Project(_Deprecated, dj.Lookup):
     """Projects within a lab.
 
     Attributes:
@@ -179,11 +222,6 @@ class Project(dj.Lookup):
         project_description ( varchar(1024) ): Description about the project.
     """
 
-    logger.warning(
-        "lab.Project and related tables will be removed in a future version of"
-        + " Element Lab. Please use the project schema."
-    )
-
     definition = """
     project                 : varchar(32)
     ---
@@ -192,7 +230,7 @@ class Project(dj.Lookup):
 
 
 @schema
-class ProjectKeywords(dj.Manual):
+class ProjectKeywords(_Deprecated, dj.Manual):
     """Project keywords or meta-information.
 
     Attributes:
@@ -207,7 +245,7 @@ class ProjectKeywords(dj.Manual):
 
 
 @schema
-class ProjectPublication(dj.Manual):
+class ProjectPublication(_Deprecated, dj.Manual):
     """Project's resulting publications.
 
     Attributes:
@@ -222,7 +260,7 @@ class ProjectPublication(dj.Manual):
 
 
 @schema
-class ProjectSourceCode(dj.Manual):
+class ProjectSourceCode(_Deprecated, dj.Manual):
     """URL to source code for replication.
 
     Attributes:
@@ -240,7 +278,7 @@ class ProjectSourceCode(dj.Manual):
 
 
 @schema
-class ProjectUser(dj.Manual):
+class ProjectUser(_Deprecated, dj.Manual):
     """Users participating in the project.
 
     Attributes:
@@ -0,0 +1,497 @@
+"""Bulk loading of lab metadata into the `lab` schema from CSV, TSV or YAML, and
+set-based synchronization of users and lab memberships with an external directory.
+"""
+
+import logging
+import math
+import re
+import time
+from pathlib import Path
+
+from . import lab
+from .utils import run_with_table_hooks
+
+logger = logging.getLogger("datajoint")
+
+# Tables in foreign-key dependency order, parents before children
+LOAD_ORDER = (
+    "Organization",
+    "Lab",
+    "Lab.Organization",
+    "Location",
+    "UserRole",
+    "User",
+    "LabMembership",
+    "ProtocolType",
+    "Protocol",
+    "Source",
+    "Device",
+)
+
+# Foreign keys of each table: (parent table, referencing attributes, nullable)
+FOREIGN_KEYS = {
+    "Lab.Organization": [
+        ("Lab", ("lab",), False),
+        ("Organization", ("organization",), False),
+    ],
+    "Location": [("Lab", ("lab",), False)],
+    "LabMembership": [
+        ("Lab", ("lab",), False),
+        ("User", ("user",), False),
+        ("UserRole", ("user_role",), True),
+    ],
+    "Protocol": [("ProtocolType", ("protocol_type",), False)],
+}
+
+
+def _get_table(table_name: str):
+    """Return the `lab` table class for a name such as 'Lab.Organization'."""
+    table = lab
+    for part in table_name.split("."):
+        table = getattr(table, part)
+    return table
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+_TABLE_NAMES = {_normalize_name(name): name for name in LOAD_ORDER}
+
+
+def _resolve_table_name(name: str) -> str:
+    """Map a file stem or YAML key (e.g., 'lab_organization') to a table name."""
+    try:
+        return _TABLE_NAMES[_normalize_name(name)]
+    except KeyError:
+        raise ValueError(
+            f"Unknown table '{name}'. Expected one of: {', '.join(LOAD_ORDER)}"
+        ) from None
+
+
+def _clean_row(row: dict) -> dict:
+    """Drop empty values so that the table defaults apply."""
+    return {
+        k: v
+        for k, v in row.items()
+        if v is not None
+        and not (isinstance(v, float) and math.isnan(v))
+        and not (isinstance(v, str) and not v.strip())
+    }
+
+
+def _read_records(source) -> dict:
+    """Read records per table from a directory of CSV/TSV files, a YAML file, or a
+    dictionary of records or DataFrames.
+
+    Returns:
+        dict: Table name mapped to a list of row dictionaries.
+    """
+    if isinstance(source, dict):
+        tables = source
+    else:
+        source = Path(source)
+        if source.is_dir():
+            import pandas as pd
+
+            tables = dict()
+            for path in sorted(source.iterdir()):
+                if path.suffix.lower() in (".csv", ".tsv"):
+                    tables[path.stem] = pd.read_csv(
+                        path,
+                        sep="\t" if path.suffix.lower() == ".tsv" else ",",
+                        dtype=str,
+                        keep_default_na=False,
+                    )
+        elif source.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(
+                    "Loading YAML files requires PyYAML: pip install pyyaml"
+                ) from None
+            with open(source) as f:
+                tables = yaml.safe_load(f) or dict()
+        else:
+            raise ValueError(
+                f"{source} is neither a directory of CSV/TSV files nor a YAML file."
+            )
+
+    records = dict()
+    for name, rows in tables.items():
+        if hasattr(rows, "to_dict"):  # pandas DataFrame
+            rows = rows.to_dict(orient="records")
+        records.setdefault(_resolve_table_name(name), []).extend(
+            _clean_row(dict(row)) for row in rows or []
+        )
+    return records
+
+
+def validate_lab_metadata(records: dict) -> list:
+    """Check that every foreign key of the records to load has a parent.
+
+    Parents may either be part of `records` or already exist in the database. Each
+    parent table is queried once, restricted to the referenced keys.
+
+    Args:
+        records (dict): Table name mapped to a list of row dictionaries.
+
+    Returns:
+        list: Descriptions of the problems found. Empty if the records are valid.
+    """
+    problems = []
+    for table_name, rows in records.items():
+        primary_key = _get_table(table_name).primary_key
+        for i, row in enumerate(rows):
+            missing = [k for k in primary_key if k not in row]
+            if missing:
+                problems.append(
+                    f"{table_name} row {i}: missing primary key attribute(s) {missing}"
+                )
+
+    for table_name, foreign_keys in FOREIGN_KEYS.items():
+        rows = records.get(table_name, [])
+        for parent_name, attributes, nullable in foreign_keys:
+            referenced = {
+                tuple(row.get(k) for k in attributes)
+                for row in rows
+                if not (nullable and any(row.get(k) is None for k in attributes))
+            }
+            available = {
+                tuple(row.get(k) for k in attributes)
+                for row in records.get(parent_name, [])
+            }
+            unresolved = referenced - available
+            if unresolved:
+                parent = _get_table(parent_name)
+                existing = (
+                    parent & [dict(zip(attributes, key)) for key in unresolved]
+                ).fetch(*attributes, as_dict=True)
+                unresolved -= {tuple(row[k] for k in attributes) for row in existing}
+            problems.extend(
+                f"{table_name}: no {parent_name} with {dict(zip(attributes, key))}"
+                for key in sorted(unresolved, key=str)
+            )
+    return problems
+
+
+def insert_chunked(
+    table, rows: list, chunk_size: int = 1000, skip_duplicates: bool = True
+) -> int:
+    """Insert rows with one multi-row INSERT statement per chunk.
+
+    Args:
+        table (dj.Table): Table to insert into.
+        rows (list): Row dictionaries.
+        chunk_size (int): Maximum number of rows per INSERT statement.
+        skip_duplicates (bool): When True (default), rows whose primary key already
+            exists are skipped.
+
+    Returns:
+        int: Number of rows submitted.
+    """
+    for start in range(0, len(rows), chunk_size):
+        table.insert(
+            rows[start : start + chunk_size],
+            skip_duplicates=skip_duplicates,
+            ignore_extra_fields=True,
+        )
+    return len(rows)
+
+
+def load_lab_metadata(
+    source, chunk_size: int = 1000, skip_duplicates: bool = True
+) -> dict:
+    """Bulk load organizations, labs, users, memberships, protocols, etc.
+
+    Records are validated before any write. They are then inserted in foreign-key
+        dependency order (see `LOAD_ORDER`) with chunked multi-row inserts inside a
+        single transaction, so a failure leaves the database unchanged.
+
+    Args:
+        source (str | Path | dict): A directory of CSV/TSV files named after the
+            tables (e.g., `Lab.csv`, `lab_organization.csv`), a YAML file mapping
+            table names to lists of rows, or a dictionary of lists or DataFrames.
+        chunk_size (int): Maximum number of rows per INSERT statement.
+        skip_duplicates (bool): When True (default), rows already in the database
+            and repeated rows in the input are skipped.
+
+    Returns:
+        dict: Rows loaded per table, total rows, seconds and rows per second.
+    """
+    records = _read_records(source)
+    if skip_duplicates:
+        for table_name, rows in records.items():
+            primary_key = _get_table(table_name).primary_key
+            unique = dict()
+            for row in rows:
+                unique.setdefault(tuple(row.get(k) for k in primary_key), row)
+            records[table_name] = list(unique.values())
+
+    problems = validate_lab_metadata(records)
+    if problems:
+        raise ValueError(
+            "Lab metadata failed validation, nothing was inserted:\n  "
+            + "\n  ".join(problems)
+        )
+
+    report = dict(tables=dict())
+    start_time = time.perf_counter()
+    with lab.schema.connection.transaction:
+        for table_name in LOAD_ORDER:
+            if records.get(table_name):
+                report["tables"][table_name] = insert_chunked(
+                    _get_table(table_name),
+                    records[table_name],
+                    chunk_size=chunk_size,
+                    skip_duplicates=skip_duplicates,
+                )
+    report["seconds"] = time.perf_counter() - start_time
+    report["rows"] = sum(report["tables"].values())
+    report["rows_per_second"] = (
+        report["rows"] / report["seconds"] if report["seconds"] else float("nan")
+    )
+    logger.info(
+        f"Loaded {report['rows']} rows into {len(report['tables'])} lab tables in"
+        f" {report['seconds']:.2f} s ({report['rows_per_second']:.0f} rows/sec)"
+    )
+    return report
+
+
+def _is_empty(value) -> bool:
+    return (
+        value is None
+        or (isinstance(value, float) and math.isnan(value))
+        or (isinstance(value, str) and not value.strip())
+    )
+
+
+def _desired_rows(table, rows, attributes: list) -> dict:
+    """Normalize rows to the given attributes, with table defaults for empty values.
+
+    Returns:
+        dict: Primary key values mapped to the row dictionary.
+    """
+    if hasattr(rows, "to_dict"):  # pandas DataFrame
+        rows = rows.to_dict(orient="records")
+    heading = table.heading
+    defaults = dict()
+    for name in attributes:
+        attribute = heading.attributes[name]
+        if attribute.nullable:
+            defaults[name] = None
+        elif attribute.default is not None and attribute.default.startswith('"'):
+            defaults[name] = attribute.default[1:-1]
+    desired = dict()
+    for i, row in enumerate(rows):
+        missing = [k for k in table.primary_key if _is_empty(row.get(k))]
+        if missing:
+            raise ValueError(f"{table.__name__} row {i}: missing {missing}")
+        desired[tuple(row[k] for k in table.primary_key)] = {
+            **{k: row[k] for k in table.primary_key},
+            **{
+                k: defaults.get(k) if _is_empty(row.get(k)) else row[k]
+                for k in attributes
+            },
+        }
+    return desired
+
+
+def _diff(table, desired: dict, attributes: list, delete) -> dict:
+    """Compare desired rows with the table, fetched with one query.
+
+    Args:
+        table (dj.Table): Table to compare.
+        desired (dict): Result of `_desired_rows`.
+        attributes (list): Secondary attributes to compare.
+        delete (callable): Called with the key of each row missing from `desired`;
+            returns True if the row is to be deleted.
+
+    Returns:
+        dict: Rows to insert, updates with the (old, new) values of the changed
+            attributes, and keys to delete.
+    """
+    primary_key = table.primary_key
+    current = {
+        tuple(row[k] for k in primary_key): row
+        for row in table.fetch(*primary_key, *attributes, as_dict=True)
+    }
+    updates = []
+    for key in sorted(desired.keys() & current.keys()):
+        changes = {
+            k: (current[key][k], desired[key][k])
+            for k in attributes
+            if current[key][k] != desired[key][k]
+        }
+        if changes:
+            updates.append(dict(key=dict(zip(primary_key, key)), changes=changes))
+    missing = (
+        dict(zip(primary_key, key)) for key in sorted(current.keys() - desired.keys())
+    )
+    return dict(
+        insert=[desired[key] for key in sorted(desired.keys() - current.keys())],
+        update=updates,
+        delete=[key for key in missing if delete(key)],
+    )
+
+
+def update_chunked(table, updates: list, chunk_size: int = 1000) -> int:
+    """Update rows with one UPDATE statement per chunk.
+
+    Unlike `update1`, which issues one statement per row, and `replace`, which
+    deletes referenced rows, this sets the changed attributes of existing rows in
+    place. The hooks of `insert` run around each statement, so that caches and
+    change tracking of element_lab see the updated rows.
+
+    Args:
+        table (dj.Table): Table to update.
+        updates (list): Dictionaries with the primary key and the new values.
+        chunk_size (int): Maximum number of rows per statement.
+
+    Returns:
+        int: Number of rows submitted.
+    """
+    primary_key = table.primary_key
+    key_columns = "(" + ", ".join(f"`{k}`" for k in primary_key) + ")"
+    key_values = "(" + ", ".join(["%s"] * len(primary_key)) + ")"
+    for start in range(0, len(updates), chunk_size):
+        chunk = updates[start : start + chunk_size]
+        attributes = list(dict.fromkeys(k for row in chunk for k in row))
+        if not all(len(row) == len(attributes) for row in chunk):
+            raise ValueError("Rows of a chunk must have the same attributes.")
+        secondary = [k for k in attributes if k not in primary_key]
+        if not secondary:
+            continue
+        assignments, args = [], []
+        for k in secondary:
+            assignments.append(
+                f"`{k}` = CASE"
+                + f" WHEN {key_columns} = {key_values} THEN %s" * len(chunk)
+                + f" ELSE `{k}` END"
+            )
+            for row in chunk:
+                args.extend([*(row[p] for p in primary_key), row[k]])
+        args.extend(row[p] for row in chunk for p in primary_key)
+        run_with_table_hooks(
+            table,
+            "insert",
+            table.connection.query,
+            f"UPDATE {table.full_table_name} SET {', '.join(assignments)}"
+            f" WHERE {key_columns} IN ({', '.join([key_values] * len(chunk))})",
+            args=tuple(args),
+        )
+    return len(updates)
+
+
+def sync_users(
+    users,
+    memberships=None,
+    delete_missing: bool = True,
+    dry_run: bool = False,
+    chunk_size: int = 1000,
+    allow_empty: bool = False,
+) -> dict:
+    """Make lab.User and lab.LabMembership match an external directory.
+
+    Each table is fetched once and compared with the desired rows by primary key.
+        Inserts, updates and deletes are then applied with chunked multi-row
+        statements inside a single transaction, so a failure leaves the database
+        unchanged. Only the attributes present in the input are compared and
+        updated; empty values stand for the table default.
+
+    Args:
+        users (DataFrame | list): Desired lab.User rows.
+        memberships (DataFrame | list, optional): Desired lab.LabMembership rows.
+            If None, memberships are only deleted for deleted users.
+        delete_missing (bool): When True (default), delete users and memberships
+            not in the input. Users still referenced by other tables, e.g.,
+            project.ProjectPersonnel, cannot be deleted and fail the sync.
+        dry_run (bool): When True, compute the changes without applying them.
+        chunk_size (int): Maximum number of rows per statement.
+        allow_empty (bool): When True, an empty `users` input is accepted, and with
+            `delete_missing` deletes all users. Defaults to False, raising
+            ValueError, as an empty export of the directory is more likely an
+            error.
+
+    Returns:
+        dict: Per table, rows to insert, updates with the (old, new) values of the
+            changed attributes, and keys to delete; whether it was a dry run; and
+            seconds.
+    """
+    start_time = time.perf_counter()
+    if hasattr(users, "to_dict"):  # pandas DataFrame
+        users = users.to_dict(orient="records")
+    if not len(users) and delete_missing and not allow_empty:
+        raise ValueError("No users given; pass allow_empty=True to delete all users.")
+    user_attributes = [
+        k
+        for k in lab.User.heading.secondary_attributes
+        if any(k in row for row in users)
+    ]
+    desired = dict(User=_desired_rows(lab.User, users, user_attributes))
+    diffs = dict(
+        User=_diff(
+            lab.User, desired["User"], user_attributes, lambda key: delete_missing
+        )
+    )
+    deleted_users = {key["user"] for key in diffs["User"]["delete"]}
+
+    if memberships is None:
+        desired["LabMembership"] = dict()
+    else:
+        desired["LabMembership"] = _desired_rows(
+            lab.LabMembership, memberships, ["user_role"]
+        )
+        problems = validate_lab_metadata(
+            {name: list(rows.values()) for name, rows in desired.items()}
+        )
+        problems += [
+            f"LabMembership: user {row['user']} is deleted"
+            for row in desired["LabMembership"].values()
+            if row["user"] in deleted_users
+        ]
+        if problems:
+            raise ValueError(
+                "Sync failed validation, nothing was changed:\n  "
+                + "\n  ".join(problems)
+            )
+    diffs["LabMembership"] = _diff(
+        lab.LabMembership,
+        desired["LabMembership"],
+        ["user_role"],
+        lambda key: key["user"] in deleted_users
+        or (delete_missing and memberships is not None),
+    )
+
+    if not dry_run:
+        with lab.schema.connection.transaction:
+            for table_name in ("LabMembership", "User"):
+                table, diff = _get_table(table_name), diffs[table_name]
+                for start in range(0, len(diff["delete"]), chunk_size):
+                    (table & diff["delete"][start : start + chunk_size]).delete_quick()
+            for table_name in ("User", "LabMembership"):
+                table, diff = _get_table(table_name), diffs[table_name]
+                insert_chunked(
+                    table, diff["insert"], chunk_size=chunk_size, skip_duplicates=False
+                )
+                update_chunked(
+                    table,
+                    [
+                        desired[table_name][tuple(u["key"].values())]
+                        for u in diff["update"]
+                    ],
+                    chunk_size=chunk_size,
+                )
+
+    report = dict(
+        tables=diffs, dry_run=dry_run, seconds=time.perf_counter() - start_time
+    )
+    logger.info(
+        ("Dry run: " if dry_run else "")
+        + "; ".join(
+            f"{name}: {len(diff['insert'])} to insert, {len(diff['update'])} to"
+            f" update, {len(diff['delete'])} to delete"
+            for name, diff in diffs.items()
+        )
+    )
+    return report
@@ -0,0 +1,185 @@
+"""In-process snapshot of the small, rarely changing lookup tables of `lab`.
+
+`LookupSnapshot` loads each table once into immutable records indexed by primary
+key, so that lookups on the request path do not query the database. `refresh`
+issues a single `CHECKSUM TABLE` query for all tables and reloads only those whose
+checksum changed; `start` runs it periodically in a background thread.
+
+Example:
+    ```python
+    from element_lab.lookups import LookupSnapshot
+
+    lookups = LookupSnapshot()
+    lookups.start(interval=30)
+    lookups["lab.Lab"].get("mylab").time_zone
+    ```
+"""
+
+import logging
+import threading
+from collections import namedtuple
+
+from .utils import element_lab_tables
+
+logger = logging.getLogger("datajoint")
+
+LOOKUP_TABLES = (
+    "lab.UserRole",
+    "lab.ProtocolType",
+    "lab.Protocol",
+    "lab.Source",
+    "lab.Device",
+    "lab.Lab",
+    "lab.Location",
+)
+
+
+class LookupTable:
+    """Rows of one table as named tuples, indexed by primary key.
+
+    Args:
+        name (str): Qualified table name, e.g., 'lab.Lab'.
+        attributes (list): Attribute names in heading order.
+        primary_key (list): Primary key attribute names.
+        rows (list): Row values in the order of `attributes`.
+    """
+
+    __slots__ = ("name", "attributes", "primary_key", "record", "_index")
+
+    def __init__(self, name: str, attributes: list, primary_key: list, rows: list):
+        self.name = name
+        self.attributes = tuple(attributes)
+        self.primary_key = tuple(primary_key)
+        self.record = namedtuple(name.rsplit(".", 1)[-1] + "Record", attributes)
+        positions = [self.attributes.index(k) for k in self.primary_key]
+        records = map(self.record._make, rows)
+        if len(positions) == 1:
+            (position,) = positions
+            self._index = {record[position]: record for record in records}
+        else:
+            self._index = {
+                tuple(record[p] for p in positions): record for record in records
+            }
+
+    def _key(self, key):
+        if isinstance(key, dict):
+            key = tuple(key[k] for k in self.primary_key)
+        if len(self.primary_key) == 1 and isinstance(key, tuple):
+            (key,) = key
+        return key
+
+    def get(self, key, default=None):
+        """Look up a row.
+
+        Args:
+            key (dict | tuple | str): Primary key as a dict, a tuple of values in
+                primary key order, or the value of a single-attribute primary key.
+            default (optional): Returned if no row has this key.
+
+        Returns:
+            namedtuple: The row, with one field per attribute.
+        """
+        return self._index.get(self._key(key), default)
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, key):
+        return self._key(key) in self._index
+
+    def __iter__(self):
+        return iter(self._index.values())
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f"LookupTable({self.name}: {len(self)} rows)"
+
+
+class LookupSnapshot:
+    """Snapshot of lookup tables refreshed when their checksums change.
+
+    Args:
+        tables (tuple, optional): Qualified table names to load. Defaults to
+            `LOOKUP_TABLES`.
+    """
+
+    def __init__(self, tables: tuple = LOOKUP_TABLES):
+        all_tables = element_lab_tables()
+        unknown = [name for name in tables if name not in all_tables]
+        assert not unknown, f"Unknown tables: {unknown}"
+        self._tables = {name: all_tables[name] for name in tables}
+        self._snapshot = dict()  # name -> LookupTable
+        self._checksums = dict()  # name -> checksum when loaded
+        self._lock = threading.Lock()
+        self._stop = None
+        self.refresh()
+
+    def _fetch_checksums(self) -> dict:
+        connection = next(iter(self._tables.values())).connection
+        names = ", ".join(table.full_table_name for table in self._tables.values())
+        return dict(connection.query(f"CHECKSUM TABLE {names}").fetchall())
+
+    def refresh(self) -> list:
+        """Reload the tables whose checksum changed since the last refresh.
+
+        Returns:
+            list: Names of the reloaded tables.
+        """
+        with self._lock:
+            checksums = self._fetch_checksums()
+            snapshot = dict(self._snapshot)
+            reloaded = []
+            for name, table in self._tables.items():
+                checksum = checksums.get(table.full_table_name.replace("`", ""))
+                if name in snapshot and checksum == self._checksums.get(name):
+                    continue
+                heading = table.heading
+                snapshot[name] = LookupTable(
+                    name,
+                    heading.names,
+                    heading.primary_key,
+                    table.fetch(order_by="KEY").tolist(),
+                )
+                self._checksums[name] = checksum
+                reloaded.append(name)
+            self._snapshot = snapshot  # replaced at once for readers in other threads
+        if reloaded:
+            logger.debug(f"Reloaded lookup tables {reloaded}")
+        return reloaded
+
+    def __getitem__(self, name: str) -> LookupTable:
+        return self._snapshot[name]
+
+    def get(self, name: str, key, default=None):
+        """Look up a row of table `name`; see `LookupTable.get`."""
+        return self._snapshot[name].get(key, default)
+
+    def start(self, interval: float = 30.0):
+        """Refresh every `interval` seconds in a daemon thread until `stop`."""
+        assert self._stop is None, "Periodic refresh is already running."
+        self._stop = threading.Event()
+
+        def run(stop):
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Refreshing lookup tables failed")
+
+        threading.Thread(
+            target=run, args=(self._stop,), name="element_lab lookups", daemon=True
+        ).start()
+
+    def stop(self):
+        """Stop the periodic refresh started with `start`."""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def __repr__(self):
+        return f"LookupSnapshot({', '.join(map(repr, self._snapshot.values()))})"
@@ -0,0 +1,77 @@
+"""Resolve users to their labs, roles, organizations and projects.
+
+`resolve_memberships` fetches each table involved once, restricted on the server,
+and joins the columns with pandas instead of chaining DataJoint joins or looping
+over users in Python.
+"""
+
+import pandas as pd
+
+from . import lab, project
+
+
+def _frame(query, attributes: list) -> pd.DataFrame:
+    """Fetch the attributes of a query into a DataFrame with one query."""
+    return pd.DataFrame(dict(zip(attributes, query.fetch(*attributes))))
+
+
+def _personnel_table():
+    """Table linking users to projects: the project schema once activated."""
+    if project.schema.is_activated():
+        return project.ProjectPersonnel
+    return lab.ProjectUser
+
+
+def resolve_memberships(
+    users=None, labs=None, include_projects: bool = True, as_records: bool = False
+):
+    """Resolve users to their labs, roles, organizations and projects.
+
+    The result has one row per combination of user, lab membership, organization
+    of the lab and project. Users without a lab membership, labs without an
+    organization and users without a project appear with missing values.
+
+    Args:
+        users (optional): Restriction on lab.User. Defaults to all users.
+        labs (optional): Restriction on lab.Lab. When given, only memberships in
+            these labs, and only their users, are included.
+        include_projects (bool): When True (default), add a `project` column from
+            project.ProjectPersonnel, or lab.ProjectUser if the project schema is
+            not activated.
+        as_records (bool): When True, return a NumPy record array instead of a
+            DataFrame.
+
+    Returns:
+        pandas.DataFrame | numpy.recarray: Columns user, user_fullname, user_email,
+            lab, user_role, organization, org_name and, optionally, project.
+    """
+    user_query = lab.User if users is None else lab.User & users
+    memberships = lab.LabMembership & user_query.proj()
+    if labs is not None:
+        memberships = memberships & (lab.Lab & labs).proj()
+        user_query = user_query & memberships.proj()
+    lab_organizations = lab.Lab.Organization & memberships.proj("lab")
+
+    result = _frame(user_query, ["user", "user_fullname", "user_email"])
+    result = result.merge(
+        _frame(memberships, ["user", "lab", "user_role"]), on="user", how="left"
+    )
+    result = result.merge(
+        _frame(lab_organizations, ["lab", "organization"]), on="lab", how="left"
+    )
+    result = result.merge(
+        _frame(
+            lab.Organization & lab_organizations.proj("organization"),
+            ["organization", "org_name"],
+        ),
+        on="organization",
+        how="left",
+    )
+    if include_projects:
+        result = result.merge(
+            _frame(_personnel_table() & user_query.proj(), ["user", "project"]),
+            on="user",
+            how="left",
+        )
+    result = result.sort_values(["user", "lab"], kind="stable", ignore_index=True)
+    return result.to_records(index=False) if as_records else result
@@ -0,0 +1,260 @@
+"""Migration of the deprecated `lab.Project*` tables to the `project` schema.
+
+The deprecated tables map to the new ones as follows:
+
++ `lab.Project` → `project.Project`: `project_description` becomes
+  `project_title`, project names shrink from varchar(32) to varchar(24), and the
+  new `project_start_date` must be provided.
++ `lab.ProjectKeywords` → `project.ProjectKeywords`
++ `lab.ProjectPublication` → `project.ProjectPublication`: varchar(256) to
+  varchar(255)
++ `lab.ProjectSourceCode` → `project.ProjectSourceCode`: varchar(256) to
+  varchar(255)
++ `lab.ProjectUser` → `project.ProjectPersonnel`
+
+`check_project_migration` lists values that do not fit the new columns and
+projects whose new names collide before anything is copied. `migrate_projects` copies the rows in primary-key order, one
+short transaction per chunk, and records the last copied key in a checkpoint file
+so that an interrupted migration resumes where it stopped. The deprecated tables
+are left unchanged.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import date
+
+from . import lab, project
+from .utils import after_key, varchar_length
+
+logger = logging.getLogger("datajoint")
+
+# (deprecated table, new table, new attribute mapped to the deprecated attribute)
+MIGRATION = (
+    (
+        "Project",
+        "Project",
+        {"project": "project", "project_title": "project_description"},
+    ),
+    (
+        "ProjectKeywords",
+        "ProjectKeywords",
+        {"project": "project", "keyword": "keyword"},
+    ),
+    (
+        "ProjectPublication",
+        "ProjectPublication",
+        {"project": "project", "publication": "publication"},
+    ),
+    (
+        "ProjectSourceCode",
+        "ProjectSourceCode",
+        {
+            "project": "project",
+            "repository_url": "repository_url",
+            "repository_name": "repository_name",
+        },
+    ),
+    ("ProjectUser", "ProjectPersonnel", {"project": "project", "user": "user"}),
+)
+
+
+def _migrated_row(row: dict, mapping: dict, rename: dict, start_date) -> dict:
+    """Row of a new table for a row of the deprecated one."""
+    new_row = {new: row[old] for new, old in mapping.items()}
+    new_row["project"] = rename.get(row["project"], row["project"])
+    if "project_title" in mapping:  # lab.Project
+        new_row["project_title"] = new_row["project_title"] or row["project"]
+        new_row["project_start_date"] = (
+            start_date if isinstance(start_date, date) else start_date[row["project"]]
+        )
+    return new_row
+
+
+def _name_collisions(start_date, rename: dict) -> list:
+    """Problems with the new project names, which would merge projects."""
+    legacy_projects = lab.Project.fetch(as_dict=True)
+    names = {row["project"] for row in legacy_projects}
+    problems = [
+        f"Renamed project {old!r} is not in lab.Project"
+        for old in sorted(rename)
+        if old not in names
+    ]
+    merged = defaultdict(list)
+    for name in sorted(names):
+        merged[rename.get(name, name)].append(name)
+    problems.extend(
+        f"lab.Project {' and '.join(map(repr, old))} would all be named {new!r}"
+        for new, old in merged.items()
+        if len(old) > 1
+    )
+    if not merged:
+        return problems
+    existing = {
+        row["project"]: row
+        for row in (project.Project & [dict(project=n) for n in merged]).fetch(
+            "project", "project_title", "project_start_date", as_dict=True
+        )
+    }
+    for row in legacy_projects:
+        new_name = rename.get(row["project"], row["project"])
+        stored = existing.get(new_name)
+        if stored is None or not (
+            isinstance(start_date, date) or row["project"] in start_date
+        ):
+            continue
+        new_row = _migrated_row(row, MIGRATION[0][2], rename, start_date)
+        if any(
+            stored[k] != new_row[k] for k in ("project_title", "project_start_date")
+        ):  # not copied by an earlier run of the migration
+            problems.append(
+                f"project.Project {new_name!r} already exists with another title or"
+                f" start date than lab.Project {row['project']!r}"
+            )
+    return problems
+
+
+def check_project_migration(start_date=None, rename: dict = None) -> list:
+    """Find deprecated project rows that cannot be copied to the project schema.
+
+    Args:
+        start_date (date | dict, optional): `project_start_date` of all projects,
+            or a dictionary mapping deprecated project names to start dates.
+        rename (dict, optional): New names of projects, e.g., to shorten names
+            longer than the 24 characters allowed by `project.Project`.
+
+    Problems include values too long for the new columns, projects without a
+        start date, rename keys that are not deprecated projects, several projects
+        getting the same new name, and new names of projects already in
+        `project.Project` with another title or start date. Their rows would
+        otherwise be merged silently, as existing rows are skipped when copying.
+
+    Returns:
+        list: Descriptions of the problems found. Empty if the migration can run.
+    """
+    assert project.schema.is_activated(), "Activate the project schema first."
+    rename = rename or dict()
+    problems = []
+    for legacy_name, new_name, mapping in MIGRATION:
+        legacy, target = getattr(lab, legacy_name), getattr(project, new_name)
+        for new_attribute, legacy_attribute in mapping.items():
+            length = varchar_length(target.heading.attributes[new_attribute])
+            if length is None or length >= varchar_length(
+                legacy.heading.attributes[legacy_attribute]
+            ):
+                continue
+            too_long = (legacy & f"CHAR_LENGTH(`{legacy_attribute}`) > {length}").fetch(
+                legacy_attribute
+            )
+            problems.extend(
+                f"lab.{legacy_name}.{legacy_attribute} {value!r} is longer than"
+                f" the {length} characters of project.{new_name}.{new_attribute}"
+                for value in sorted(set(too_long))
+                if not (legacy_attribute == "project" and value in rename)
+            )
+    problems.extend(
+        f"Project name {new!r} for {old!r} is longer than 24 characters"
+        for old, new in rename.items()
+        if len(new) > 24
+    )
+    if not isinstance(start_date, date):
+        start_date = start_date or dict()
+        problems.extend(
+            f"lab.Project {name!r} has no start date"
+            for name in lab.Project.fetch("project")
+            if name not in start_date
+        )
+    problems.extend(_name_collisions(start_date, rename))
+    return problems
+
+
+def _load_checkpoint(path: str) -> dict:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return dict(tables=dict())
+
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    if path:
+        with open(path + ".tmp", "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(path + ".tmp", path)  # never leave a partial checkpoint
+
+
+def migrate_projects(
+    start_date=None,
+    rename: dict = None,
+    checkpoint: str = None,
+    chunk_size: int = 1000,
+    progress=None,
+) -> dict:
+    """Copy the deprecated `lab.Project*` tables to the project schema.
+
+    The problems reported by `check_project_migration` are checked first. Rows
+        are then copied table by table in primary-key order, with one multi-row
+        insert and one short transaction per chunk. Rows already in the project
+        schema are skipped, so the migration can be run again safely. Projects
+        without a description get their name as `project_title`.
+
+    Args:
+        start_date (date | dict): `project_start_date` of all projects, or a
+            dictionary mapping deprecated project names to start dates.
+        rename (dict, optional): New names of projects, e.g., to shorten names
+            longer than 24 characters.
+        checkpoint (str, optional): JSON file recording the progress. If it
+            exists, the migration resumes after the last copied chunk.
+        chunk_size (int): Maximum number of rows per chunk.
+        progress (callable, optional): Called as `progress(table_name, copied,
+            total)` after each chunk.
+
+    Returns:
+        dict: Rows copied per deprecated table, including those copied before a
+            resume, and seconds.
+    """
+    problems = check_project_migration(start_date, rename)
+    if problems:
+        raise ValueError(
+            "Project migration failed validation, nothing was copied:\n  "
+            + "\n  ".join(problems)
+        )
+    rename = rename or dict()
+    state = _load_checkpoint(checkpoint)
+    start_time = time.perf_counter()
+
+    for legacy_name, new_name, mapping in MIGRATION:
+        table_state = state["tables"].setdefault(
+            legacy_name, dict(last_key=None, rows=0, done=False)
+        )
+        if table_state["done"]:
+            continue
+        legacy, target = getattr(lab, legacy_name), getattr(project, new_name)
+        primary_key = legacy.primary_key
+        total = len(legacy())
+        while True:
+            query = legacy
+            if table_state["last_key"] is not None:
+                query = legacy & after_key(primary_key, table_state["last_key"])
+            rows = query.fetch(as_dict=True, order_by=primary_key, limit=chunk_size)
+            if not rows:
+                break
+            new_rows = [_migrated_row(row, mapping, rename, start_date) for row in rows]
+            with project.schema.connection.transaction:
+                target.insert(new_rows, skip_duplicates=True)
+            table_state["last_key"] = [rows[-1][k] for k in primary_key]
+            table_state["rows"] += len(rows)
+            _save_checkpoint(checkpoint, state)
+            logger.info(
+                f"Migrated {table_state['rows']}/{total} rows of lab.{legacy_name}"
+            )
+            if progress is not None:
+                progress(legacy_name, table_state["rows"], total)
+        table_state["done"] = True
+        _save_checkpoint(checkpoint, state)
+
+    return dict(
+        tables={name: s["rows"] for name, s in state["tables"].items()},
+        seconds=time.perf_counter() - start_time,
+    )
@@ -0,0 +1,135 @@
+"""Query plans of the queries issued by element_lab.
+
+`profile` runs EXPLAIN on the SQL of the joins and restrictions used by
+`export.nwb`, `queries`, `membership`, `export.dossier` and
+`project.ProjectSummary`, and flags full table scans, filesorts, temporary tables
+and joins or restrictions without a usable index. Run it against a database
+seeded at realistic scale, e.g., with `benchmarks/explain.py` in CI.
+"""
+
+import logging
+
+from . import lab, project
+from .utils import like_prefix
+
+logger = logging.getLogger("datajoint")
+
+FINDING_KINDS = ("full_scan", "missing_index", "filesort", "temporary")
+
+
+def _sample_key(table, fallback: dict) -> dict:
+    """An existing primary key of `table`, or `fallback` if it is empty."""
+    keys = table.fetch("KEY", limit=1)
+    return keys[0] if keys else fallback
+
+
+def element_lab_queries() -> dict:
+    """Queries issued by element_lab, restricted by keys sampled from the tables.
+
+    Returns:
+        dict: Name mapped to the query expression.
+    """
+    lab_key = _sample_key(lab.Lab, dict(lab="lab"))
+    protocol_key = _sample_key(lab.Protocol, dict(protocol="protocol"))
+    emails = lab.User.fetch("user_email", limit=1)
+    queries = {
+        "export.nwb lab": lab.Lab * lab.Lab.Organization * lab.Organization & lab_key,
+        "export.nwb protocol": lab.Protocol & protocol_key,
+        "queries.users_by_email": lab.User
+        & dict(user_email=emails[0] if len(emails) else "user@example.org"),
+        "membership memberships of labs": lab.LabMembership
+        & (lab.Lab & lab_key).proj(),
+        "membership organizations of labs": lab.Lab.Organization
+        & (lab.LabMembership & lab_key).proj("lab"),
+    }
+    if not project.schema.is_activated():
+        return queries
+
+    project_key = _sample_key(project.Project, dict(project="project"))
+    study_key = _sample_key(project.Study, dict(project_key, study="study"))
+    keyword = (project.ProjectKeywords & project_key).fetch("keyword", limit=1)
+    keyword = keyword[0] if len(keyword) else "keyword"
+    project_keys = (project.Project & project_key).proj()
+    queries.update(
+        {
+            "export.nwb project": project.Project & project_key,
+            "export.nwb keywords": project.ProjectKeywords & project_key,
+            "export.nwb publications": project.ProjectPublication & project_key,
+            "queries.projects_with_keyword": project.ProjectKeywords
+            & dict(keyword=keyword),
+            "queries.projects_with_keyword prefix": project.ProjectKeywords
+            & f"keyword LIKE {like_prefix(keyword[:3])}",
+            "queries.experiments_for_lab": project.Experiment
+            & dict(lab=lab_key["lab"]),
+            "queries.experiments_for_study": project.Experiment
+            & {k: study_key[k] for k in ("project", "study")},
+            "export.dossier personnel": project.ProjectPersonnel
+            * project._linking_module.User
+            & project_keys,
+            "export.dossier study protocols": project.Study.Protocol & project_keys,
+            "export.dossier experiments": project.Experiment & project_keys,
+            "project.ProjectSummary": project.ProjectSummary._summary_query(
+                project_key
+            ),
+        }
+    )
+    return queries
+
+
+def _findings(plan: list, min_rows: int) -> list:
+    """Flag the problems of one EXPLAIN result."""
+    findings = []
+    for row in plan:
+        row = {k.lower(): v for k, v in row.items()}
+        table = row.get("table")
+        rows = row.get("rows") or 0
+        extra = row.get("extra") or ""
+        if row.get("type") == "ALL" and rows >= min_rows:
+            findings.append(dict(kind="full_scan", table=table, rows=rows))
+            if not row.get("possible_keys") and (
+                "Using where" in extra or "join buffer" in extra
+            ):
+                findings.append(dict(kind="missing_index", table=table, rows=rows))
+        if "Using filesort" in extra:
+            findings.append(dict(kind="filesort", table=table, rows=rows))
+        if "Using temporary" in extra:
+            findings.append(dict(kind="temporary", table=table, rows=rows))
+    return findings
+
+
+def explain(query) -> list:
+    """Run EXPLAIN on the SQL of a query expression.
+
+    Returns:
+        list: One dictionary per row of the query plan.
+    """
+    return list(
+        query.connection.query(f"EXPLAIN {query.make_sql()}", as_dict=True).fetchall()
+    )
+
+
+def profile(queries: dict = None, min_rows: int = 100) -> list:
+    """Explain queries and flag inefficient plans.
+
+    Args:
+        queries (dict, optional): Name mapped to query expression. Defaults to
+            `element_lab_queries()`.
+        min_rows (int): Full scans of tables with fewer estimated rows than this
+            are not flagged. Defaults to 100.
+
+    Returns:
+        list: Per query, its name, SQL, plan and findings. Each finding names its
+            kind (one of `FINDING_KINDS`), table and estimated rows.
+    """
+    if queries is None:
+        queries = element_lab_queries()
+    results = []
+    for name, query in queries.items():
+        plan = explain(query)
+        findings = _findings(plan, min_rows)
+        for finding in findings:
+            logger.info(f"{name}: {finding['kind']} on {finding['table']}")
+        results.append(
+            dict(name=name, sql=query.make_sql(), plan=plan, findings=findings)
+        )
+    return results
@@ -1,19 +1,45 @@
 import importlib
 import inspect
+import logging
+import sys
+from contextlib import contextmanager
 
 import datajoint as dj
 
+from .declaration import activate_fast
+from .instrumentation import instrumented
+from .utils import add_table_method_hook
+
+logger = logging.getLogger("datajoint")
+
 schema = dj.Schema()
 
 _linking_module = None
 
-
+# Tables aggregated by ProjectSummary
+_SUMMARIZED = (
+    "Project",
+    "Study",
+    "Experiment",
+    "ProjectPersonnel",
+    "ProjectKeywords",
+    "ProjectPublication",
+    "ProjectSourceCode",
+)
+_TRACKED_METHODS = ("insert", "update1", "delete", "delete_quick")
+_UNTRACKED = ("project.ProjectSummary", "project.ProjectSummaryChange")
+_track_changes = False  # whether changes are recorded in ProjectSummaryChange
+
+
+@instrumented("project.activate")
 def activate(
     schema_name,
     *,
     create_schema=True,
     create_tables=True,
     linking_module=None,
+    fast=False,
+    track_summary=False,
 ):
     """Activate this schema
 
@@ -25,6 +51,12 @@ def activate(
             if they do not yet exist.
         linking_module (str): A string containing the module name or module containing
             the required dependencies to activate the schema.
+        fast (bool): when True, skip table declaration if the table definitions match
+            those stored at the last declaration, and prefetch all table headings in
+            bulk. See `element_lab.declaration`.
+        track_summary (bool): when True, record the projects changed through
+            element_lab tables in `ProjectSummaryChange`, so that
+            `ProjectSummary.refresh` recomputes only those. Defaults to False.
 
     Dependencies:
     Upstream tables:
@@ -38,15 +70,104 @@ def activate(
         linking_module
     ), "The argument 'linking_module' must be a module or module name"
 
-    global _linking_module
+    global _linking_module, _track_changes
     _linking_module = linking_module
 
-    schema.activate(
-        schema_name,
+    activate_kwargs = dict(
         create_schema=create_schema,
         create_tables=create_tables,
         add_objects=_linking_module.__dict__,
     )
+    if fast:
+        activate_fast(sys.modules[__name__], schema_name, **activate_kwargs)
+    else:
+        schema.activate(schema_name, **activate_kwargs)
+
+    _track_changes = False
+    if track_summary:
+        if not ProjectSummaryChange.is_declared:
+            logger.warning(
+                "ProjectSummaryChange is not declared; summary changes are not tracked."
+            )
+            return
+        _track_changes = True
+        for method_name in _TRACKED_METHODS:
+            add_table_method_hook(
+                method_name, _track_summary_changes, with_arguments=True
+            )
+
+
+def _mark_changed(projects):
+    """Record projects whose summaries must be recomputed; None marks all."""
+    if projects is None:
+        ProjectSummaryChange.insert(Project.proj(), skip_duplicates=True)
+    elif projects:
+        ProjectSummaryChange.insert(
+            [dict(project=p) for p in projects], skip_duplicates=True
+        )
+
+
+def _row_projects(table, rows):
+    """Projects of inserted or updated rows, or None if they cannot be told."""
+    if isinstance(rows, dj.expression.QueryExpression):
+        return set(rows.fetch("project"))
+    if hasattr(rows, "columns"):  # pandas.DataFrame
+        return set(rows["project"]) if "project" in rows.columns else None
+    projects = set()
+    try:
+        for row in rows:
+            if isinstance(row, dict) or getattr(row, "dtype", None) is not None:
+                projects.add(row["project"])
+            else:  # a sequence in heading order
+                projects.add(row[table.heading.names.index("project")])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return projects
+
+
+def _deleted_projects(table_name: str, table) -> set:
+    """Projects with rows deleted by `table.delete()`, including by cascade."""
+    module_name, _, name = table_name.partition(".")
+    if module_name == "project" and name in _SUMMARIZED:
+        # cascades from these tables stay within the same projects
+        return set(table.fetch("project"))
+    projects = set()
+    for name in _SUMMARIZED:
+        child = globals()[name]
+        if set(table.primary_key) <= set(child.heading.names):
+            projects.update((child & table.proj()).fetch("project"))
+    return projects
+
+
+@contextmanager
+def _track_summary_changes(table_name: str, method_name: str, args: list, kwargs):
+    """Record the projects changed by a method of an element_lab table."""
+    if not _track_changes or table_name in _UNTRACKED:
+        yield
+        return
+    table = args[0]
+    module_name, _, name = table_name.partition(".")
+    summarized = module_name == "project" and name in _SUMMARIZED
+    projects = set()
+    if method_name in ("delete", "delete_quick"):
+        projects = _deleted_projects(table_name, table)  # before the rows are gone
+    elif summarized and method_name == "insert":
+        rows = args[1] if len(args) > 1 else kwargs.get("rows")
+        if (
+            not isinstance(rows, dj.expression.QueryExpression)
+            and not hasattr(rows, "columns")
+            and iter(rows) is rows
+        ):  # materialize iterators, which the insert would consume
+            rows = list(rows)
+            if len(args) > 1:
+                args[1] = rows
+            else:
+                kwargs["rows"] = rows
+    yield
+    if summarized and method_name in ("insert", "update1"):
+        rows = args[1] if len(args) > 1 else kwargs.get("rows", kwargs.get("row"))
+        projects = _row_projects(table, [rows] if method_name == "update1" else rows)
+    _mark_changed(projects)
 
 
 @schema
@@ -99,6 +220,7 @@ class ProjectKeywords(dj.Manual):
     # Project keywords. If the dataset is exported, this metadata is saved within the NWB file.
     -> Project
     keyword: varchar(32) # Keywords describing the project
+    index(keyword)
     """
 
 
@@ -194,3 +316,146 @@ class Experiment(dj.Manual):
     -> Lab
     -> [nullable] Protocol
     """
+
+
+@schema
+class ProjectSummary(dj.Computed):
+    """Roll-up of the studies, experiments, personnel, etc. of a project
+
+    Populate with `ProjectSummary.populate()` for new projects, and call
+    `ProjectSummary.refresh()` to bring changed projects up to date. With
+    `activate(..., track_summary=True)`, only the projects whose children changed
+    are recomputed.
+
+    Attributes:
+        Project (foreign key): Project key
+        study_count (int): Number of studies
+        experiment_count (int): Number of experiments
+        personnel_count (int): Number of individuals involved in the project
+        keyword_count (int): Number of keywords
+        publication_count (int): Number of publications
+        source_code_count (int): Number of source code repositories
+        lab_count (int): Number of labs running experiments of the project
+        project_start_date (date): The start of the project
+        project_end_date (date, optional): The end date of the project
+    """
+
+    definition = """# Roll-up of the studies, experiments, personnel, etc. of a project
+    -> Project
+    ---
+    study_count           : int unsigned  # number of studies
+    experiment_count      : int unsigned  # number of experiments
+    personnel_count       : int unsigned  # number of individuals involved
+    keyword_count         : int unsigned  # number of keywords
+    publication_count     : int unsigned  # number of publications
+    source_code_count     : int unsigned  # number of source code repositories
+    lab_count             : int unsigned  # number of labs running experiments
+    project_start_date    : date          # the start of the project
+    project_end_date=NULL : date          # the end date of the project
+    """
+
+    @staticmethod
+    def _summary_query(restriction=True):
+        """Query computing the summaries of all restricted projects."""
+        projects = Project & restriction
+        summaries = projects.proj("project_start_date", "project_end_date")
+        for child, counts in (
+            (Study, dict(study_count="count(study)")),
+            (
+                Experiment,
+                dict(
+                    experiment_count="count(experiment)",
+                    lab_count="count(distinct lab)",
+                ),
+            ),
+            (ProjectPersonnel, dict(personnel_count="count(user)")),
+            (ProjectKeywords, dict(keyword_count="count(keyword)")),
+            (ProjectPublication, dict(publication_count="count(publication)")),
+            (ProjectSourceCode, dict(source_code_count="count(repository_url)")),
+        ):
+            summaries = summaries * projects.aggr(child, **counts, keep_all_rows=True)
+        return summaries
+
+    @staticmethod
+    def _summarize(restriction=True) -> list:
+        """Compute the summaries of all restricted projects in a single query."""
+        return ProjectSummary._summary_query(restriction).fetch(as_dict=True)
+
+    def make(self, key):
+        self.insert1(self._summarize(key)[0])
+
+    @classmethod
+    def refresh(cls, restriction=True, full: bool = None) -> int:
+        """Bring the summaries up to date, recomputing only changed projects.
+
+        With `activate(..., track_summary=True)`, inserts, updates and deletes
+        through element_lab tables, including deletes cascading from `lab.User`,
+        `lab.Lab` and `lab.Protocol`, record the affected projects in
+        `ProjectSummaryChange`. Only these projects and projects without a summary
+        are then aggregated, in one query, and only differing rows are replaced.
+        Changes made without tracking, e.g., in SQL or by processes activating the
+        schema without `track_summary`, are not recorded; use `full=True` to
+        recompute all projects.
+
+        Args:
+            restriction (optional): Restriction on Project. Defaults to all projects.
+            full (bool, optional): When True, recompute all restricted projects.
+                Defaults to False if changes are tracked, and True otherwise.
+
+        Returns:
+            int: Number of summaries inserted or replaced.
+        """
+        if full is None:
+            full = not _track_changes
+        connection = cls().connection
+        with connection.transaction:
+            projects = Project & restriction
+            pending, names = [], set()
+            if _track_changes:
+                pending = [
+                    row[0]
+                    for row in connection.query(
+                        f"SELECT project FROM {ProjectSummaryChange.full_table_name}"
+                        " FOR UPDATE"
+                    ).fetchall()
+                ]
+            if pending:
+                marked = [dict(project=p) for p in pending]
+                names = set((projects & marked).fetch("project"))
+                existing = set((Project & marked).fetch("project"))
+                # marks of deleted projects are done; others wait for their restriction
+                pending = [p for p in pending if p in names or p not in existing]
+            if not full:
+                names.update((projects - cls).fetch("project"))
+                projects = Project & [dict(project=p) for p in names]
+            current = {row["project"]: row for row in cls._summarize(projects)}
+            stored = {
+                row["project"]: row for row in (cls & projects).fetch(as_dict=True)
+            }
+            stale = [dict(project=p) for p in stored if current.get(p) != stored[p]]
+            changed = [row for p, row in current.items() if stored.get(p) != row]
+            if stale:
+                (cls & stale).delete_quick()
+            cls.insert(changed, allow_direct_insert=True)
+            if pending:
+                (
+                    ProjectSummaryChange & [dict(project=p) for p in pending]
+                ).delete_quick()
+        return len(changed)
+
+
+@schema
+class ProjectSummaryChange(dj.Manual):
+    """Projects whose ProjectSummary may be out of date
+
+    Filled by element_lab when the schema is activated with `track_summary=True`,
+    and emptied by `ProjectSummary.refresh`.
+
+    Attributes:
+        project ( varchar(24) ): Abbreviated project name, not necessarily of an
+            existing project
+    """
+
+    definition = """# Projects whose ProjectSummary may be out of date
+    project : varchar(24)  # abbreviated project name
+    """
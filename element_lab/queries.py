@@ -0,0 +1,112 @@
+"""Reverse lookups over secondary attributes of the `lab` and `project` schemas.
+
+Each helper restricts only by equality, or by a prefix, on an indexed column, so
+MySQL answers it from the index instead of scanning the table:
+
+| Helper                   | Table                     | Index                  |
+| ------------------------ | ------------------------- | ---------------------- |
+| `projects_with_keyword`  | `project.ProjectKeywords` | `index(keyword)`       |
+| `users_by_email`         | `lab.User`                | `index(user_email)`    |
+| `experiments_for_lab`    | `project.Experiment`      | foreign key to `Lab`   |
+| `experiments_for_study`  | `project.Experiment`      | foreign key to `Study` |
+
+Tables declared before these indexes were added to the definitions can be
+upgraded in place with `add_missing_indexes`.
+"""
+
+import logging
+
+from . import lab, project
+from .utils import like_prefix
+
+logger = logging.getLogger("datajoint")
+
+
+def _secondary_indexes() -> dict:
+    """Secondary indexes declared in the table definitions, by table."""
+    return {lab.User: [("user_email",)], project.ProjectKeywords: [("keyword",)]}
+
+
+def add_missing_indexes() -> list:
+    """Add the secondary indexes of the current definitions to existing tables.
+
+    DataJoint does not alter declared tables, so indexes added to a definition are
+    missing from tables declared with an earlier version of element_lab.
+
+    Returns:
+        list: (table name, columns) of each index added.
+    """
+    added = []
+    for table, indexes in _secondary_indexes().items():
+        existing = set(table.heading.indexes)
+        for columns in indexes:
+            if columns in existing:
+                continue
+            table.connection.query(
+                f"ALTER TABLE {table.full_table_name} ADD INDEX"
+                f" ({', '.join(f'`{c}`' for c in columns)})"
+            )
+            logger.info(f"Added index {columns} to {table.full_table_name}")
+            added.append((table.full_table_name, columns))
+    return added
+
+
+def projects_with_keyword(keyword: str, prefix: bool = False) -> list:
+    """Find the projects tagged with a keyword.
+
+    Args:
+        keyword (str): Keyword, or beginning of keywords if `prefix` is True.
+        prefix (bool): When True, match all keywords starting with `keyword`.
+
+    Returns:
+        list: Keys of the matching project.Project entries.
+    """
+    restriction = (
+        f"keyword LIKE {like_prefix(keyword)}" if prefix else {"keyword": keyword}
+    )
+    projects = (project.ProjectKeywords & restriction).fetch("project")
+    return [dict(project=p) for p in sorted(set(projects))]
+
+
+def users_by_email(email: str) -> list:
+    """Find the users with an email address.
+
+    Email addresses are not unique in lab.User, e.g., for shared lab accounts.
+
+    Args:
+        email (str): Email address stored in lab.User.user_email. An empty address
+            matches no user, as it is the default of users without one.
+
+    Returns:
+        list: The matching lab.User entries, ordered by user.
+    """
+    if not email:
+        return []
+    return (lab.User & {"user_email": email}).fetch(as_dict=True, order_by="user")
+
+
+def experiments_for_lab(lab_key: dict) -> list:
+    """List the experiments run in a lab.
+
+    Args:
+        lab_key (dict): Key specifying one entry in element_lab.lab.Lab
+
+    Returns:
+        list: Keys of the matching project.Experiment entries.
+    """
+    return (project.Experiment & {"lab": lab_key["lab"]}).fetch("KEY", order_by="KEY")
+
+
+def experiments_for_study(study_key: dict) -> list:
+    """List the experiments of a study.
+
+    Args:
+        study_key (dict): Key specifying one entry in element_lab.project.Study
+
+    Returns:
+        list: Keys of the matching project.Experiment entries.
+    """
+    return (
+        project.Experiment
+        & {"project": study_key["project"], "study": study_key["study"]}
+    ).fetch("KEY", order_by="KEY")
@@ -0,0 +1,384 @@
+"""In-process full-text and prefix search over element_lab descriptions.
+
+`SearchIndex` fetches the text columns listed in `SOURCES` once and builds an
+inverted index in memory. Searches rank matches with BM25 and treat the last word
+of the query as a prefix, for autocomplete, without querying the database.
+
+Inserts and updates issued through element_lab tables record the primary keys of
+the changed rows; the next search re-fetches only those rows. Deletes, which may
+cascade to other sources, and inserts whose keys cannot be told, e.g., from a query,
+re-fetch the affected sources. Rows changed outside element_lab can be indexed with
+`SearchIndex.refresh`.
+
+Example:
+    ```python
+    index = SearchIndex()
+    index.search("visual cort", limit=5)
+    ```
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+
+import datajoint as dj
+
+from .utils import add_table_method_hook, element_lab_tables, remove_table_method_hook
+
+logger = logging.getLogger("datajoint")
+
+# Qualified table name mapped to the indexed text attributes
+SOURCES = {
+    "project.Project": ("project_title",),
+    "project.Study": ("study_description",),
+    "project.Experiment": ("experiment_description",),
+    "lab.Protocol": ("protocol_description",),
+    "lab.Device": ("description",),
+    "lab.User": ("user_fullname",),
+}
+
+_TOKEN = re.compile(r"\w+")
+_UPDATING_METHODS = ("insert", "update1")
+_DELETING_METHODS = ("delete", "delete_quick")  # deletes cascade to other sources
+
+
+# Indexes tracking changes; weak references so that dropped indexes are collected
+_tracking = weakref.WeakSet()
+
+
+def tokenize(text: str) -> list:
+    """Split text into lowercase words."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _row_keys(primary_key: list, names: list, rows) -> list:
+    """Primary keys of inserted or updated rows, or None if they cannot be told."""
+    if isinstance(rows, dj.expression.QueryExpression):
+        return None
+    if hasattr(rows, "columns"):  # pandas.DataFrame
+        if not set(primary_key) <= set(rows.columns):
+            return None
+        return list(zip(*(rows[k] for k in primary_key)))
+    keys = []
+    try:
+        for row in rows:
+            if isinstance(row, dict) or getattr(row, "dtype", None) is not None:
+                keys.append(tuple(row[k] for k in primary_key))
+            else:  # a sequence in heading order
+                keys.append(tuple(row[names.index(k)] for k in primary_key))
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return keys
+
+
+@contextmanager
+def _track_changes(table_name: str, method_name: str, args: list, kwargs):
+    """Record the rows of indexed sources changed by a method of a table."""
+    indexes = [index for index in _tracking if index.track_changes]
+    if not indexes:
+        yield
+        return
+    indexed = any(table_name in index.sources for index in indexes)
+    if indexed and method_name == "insert":
+        rows = args[1] if len(args) > 1 else kwargs.get("rows")
+        if (
+            not isinstance(rows, dj.expression.QueryExpression)
+            and not hasattr(rows, "columns")
+            and iter(rows) is rows
+        ):  # materialize iterators, which the insert would consume
+            rows = list(rows)
+            if len(args) > 1:
+                args[1] = rows
+            else:
+                kwargs["rows"] = rows
+    try:
+        yield
+    finally:
+        if method_name in _DELETING_METHODS:
+            for index in indexes:
+                index._mark_stale(list(index.sources))
+        elif indexed:
+            table = args[0]
+            rows = args[1] if len(args) > 1 else kwargs.get("rows", kwargs.get("row"))
+            keys = _row_keys(
+                table.primary_key,
+                table.heading.names,
+                [rows] if method_name == "update1" else rows,
+            )
+            for index in indexes:
+                if table_name in index.sources:
+                    index._mark_stale([table_name], keys)
+
+
+class SearchIndex:
+    """Inverted index over text attributes of element_lab tables.
+
+    Args:
+        sources (dict, optional): Qualified table name mapped to the text
+            attributes to index. Defaults to `SOURCES`, restricted to the
+            activated schemas.
+        track_changes (bool): When True (default), re-index sources modified
+            through element_lab before the next search.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 document length normalization.
+    """
+
+    def __init__(
+        self,
+        sources: dict = None,
+        track_changes: bool = True,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        from . import lab, project
+
+        tables = element_lab_tables(
+            tuple(m for m in (lab, project) if m.schema.is_activated())
+        )
+        if sources is None:
+            sources = {k: v for k, v in SOURCES.items() if k in tables}
+        self._tables = {name: tables[name] for name in sources}
+        self.sources = dict(sources)
+        self.k1 = k1
+        self.b = b
+        self._documents = dict()  # id -> (table, key, attribute, text, terms, length)
+        self._ids = dict()  # (table, key, attribute) -> document id
+        self._postings = dict()  # term -> {document id: term frequency}
+        self._terms = []  # sorted vocabulary, for prefix lookups
+        self._terms_changed = False
+        self._total_length = 0
+        self._next_id = 0
+        self._stale = dict()  # source -> set of changed keys, None for all rows
+        self._lock = threading.RLock()
+        self.track_changes = track_changes
+        if track_changes:
+            if not _tracking:
+                for method_name in _UPDATING_METHODS + _DELETING_METHODS:
+                    add_table_method_hook(
+                        method_name, _track_changes, with_arguments=True
+                    )
+            _tracking.add(self)
+        for name in self.sources:
+            self.refresh(name)
+
+    def _mark_stale(self, table_names: list, keys: list = None):
+        """Record changed rows, given as primary key tuples; None marks all rows."""
+        with self._lock:
+            for name in table_names:
+                if keys is None:
+                    self._stale[name] = None
+                elif self._stale.get(name, set()) is not None:
+                    self._stale.setdefault(name, set()).update(keys)
+
+    def close(self):
+        """Stop tracking changes of element_lab tables."""
+        if self.track_changes:
+            self.track_changes = False
+            _tracking.discard(self)
+            if not _tracking:
+                for method_name in _UPDATING_METHODS + _DELETING_METHODS:
+                    remove_table_method_hook(method_name, _track_changes)
+
+    def _add(self, document: tuple, text: str):
+        terms = Counter(tokenize(text))
+        document_id = self._next_id
+        self._next_id += 1
+        length = sum(terms.values())
+        self._documents[document_id] = (*document, text, terms, length)
+        self._ids[document] = document_id
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = dict()
+                self._terms_changed = True
+            postings[document_id] = frequency
+        self._total_length += length
+
+    def _remove(self, document: tuple):
+        document_id = self._ids.pop(document)
+        *_, terms, length = self._documents.pop(document_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[document_id]
+            if not postings:
+                del self._postings[term]
+                self._terms_changed = True
+        self._total_length -= length
+
+    def update(self, table_name: str, rows: list):
+        """Index or re-index rows of a source table.
+
+        Args:
+            table_name (str): Qualified table name, e.g., 'lab.User'.
+            rows (list): Row dictionaries with the primary key and text attributes.
+        """
+        primary_key = self._tables[table_name].primary_key
+        with self._lock:
+            for row in rows:
+                key = tuple(row[k] for k in primary_key)
+                for attribute in self.sources[table_name]:
+                    document = (table_name, key, attribute)
+                    text = row.get(attribute) or ""
+                    document_id = self._ids.get(document)
+                    if document_id is not None:
+                        if self._documents[document_id][3] == text:
+                            continue
+                        self._remove(document)
+                    if text:
+                        self._add(document, text)
+
+    def remove(self, table_name: str, keys: list):
+        """Remove rows of a source table, given as primary key dictionaries."""
+        primary_key = self._tables[table_name].primary_key
+        with self._lock:
+            for key in keys:
+                key = tuple(key[k] for k in primary_key)
+                for attribute in self.sources[table_name]:
+                    if (table_name, key, attribute) in self._ids:
+                        self._remove((table_name, key, attribute))
+
+    def refresh(self, table_name: str = None, keys: list = None):
+        """Re-fetch source tables, one query each, and re-index the changed rows.
+
+        Args:
+            table_name (str, optional): Source to refresh. Defaults to all sources.
+            keys (list, optional): Primary key tuples of the rows of `table_name`
+                to re-fetch; rows no longer in the table are removed. Defaults to
+                all rows.
+        """
+        for name in [table_name] if table_name else list(self.sources):
+            table = self._tables[name]
+            primary_key = table.primary_key
+            attributes = (*primary_key, *self.sources[name])
+            if keys is None:
+                indexed = {
+                    key for (source, key, _) in list(self._ids) if source == name
+                }
+                rows = table.fetch(*attributes, as_dict=True)
+            elif keys:
+                indexed = set(keys)
+                rows = (table & [dict(zip(primary_key, key)) for key in indexed]).fetch(
+                    *attributes, as_dict=True
+                )
+            else:
+                continue
+            with self._lock:
+                current = {tuple(row[k] for k in primary_key) for row in rows}
+                self.remove(
+                    name, [dict(zip(primary_key, key)) for key in indexed - current]
+                )
+                self.update(name, rows)
+                self._expand("")  # sort the vocabulary now rather than in a search
+            logger.debug(f"Indexed {len(rows)} rows of {name}")
+
+    def _expand(self, prefix: str) -> list:
+        """Vocabulary terms starting with `prefix`."""
+        if self._terms_changed:
+            self._terms = sorted(self._postings)
+            self._terms_changed = False
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\U0010ffff")
+        return self._terms[start:end]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        tables: list = None,
+        prefix: bool = True,
+    ) -> list:
+        """Find the rows whose text matches all words of the query.
+
+        Args:
+            query (str): Words to search for.
+            limit (int): Maximum number of results. Defaults to 10.
+            tables (list, optional): Restrict results to these qualified table names.
+            prefix (bool): When True (default), the last word also matches longer
+                words starting with it, e.g., while typing.
+
+        Returns:
+            list: Matches in decreasing order of relevance, each a dictionary with
+                the table name, primary key, attribute, text and score.
+        """
+        with self._lock:
+            stale, self._stale = self._stale, dict()
+        for name, keys in stale.items():
+            self.refresh(name, keys)
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            n_documents = len(self._documents) or 1
+            average_length = self._total_length / n_documents or 1
+            scores = None
+            for i, word in enumerate(words):
+                if prefix and i == len(words) - 1:
+                    terms = self._expand(word)
+                else:
+                    terms = [word] if word in self._postings else []
+                word_scores = Counter()
+                for term in terms:
+                    postings = self._postings[term]
+                    idf = math.log(
+                        1 + (n_documents - len(postings) + 0.5) / (len(postings) + 0.5)
+                    )
+                    for document_id, frequency in postings.items():
+                        length = self._documents[document_id][5]
+                        score = (
+                            idf
+                            * frequency
+                            * (self.k1 + 1)
+                            / (
+                                frequency
+                                + self.k1
+                                * (1 - self.b + self.b * length / average_length)
+                            )
+                        )
+                        word_scores[document_id] = max(word_scores[document_id], score)
+                if scores is None:
+                    scores = word_scores
+                else:  # documents must match every word
+                    scores = Counter(
+                        {
+                            document_id: score + word_scores[document_id]
+                            for document_id, score in scores.items()
+                            if document_id in word_scores
+                        }
+                    )
+                if not scores:
+                    return []
+            if tables is not None:
+                scores = {
+                    document_id: score
+                    for document_id, score in scores.items()
+                    if self._documents[document_id][0] in tables
+                }
+            results = []
+            for document_id in heapq.nlargest(limit, scores, key=scores.get):
+                table_name, key, attribute, text, *_ = self._documents[document_id]
+                primary_key = self._tables[table_name].primary_key
+                results.append(
+                    dict(
+                        table=table_name,
+                        key=dict(zip(primary_key, key)),
+                        attribute=attribute,
+                        text=text,
+                        score=scores[document_id],
+                    )
+                )
+            return results
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __repr__(self):
+        return (
+            f"SearchIndex({len(self)} documents, {len(self._postings)} terms,"
+            f" {len(self.sources)} sources)"
+        )
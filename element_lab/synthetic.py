@@ -0,0 +1,345 @@
+"""Deterministic synthetic lab metadata for load testing.
+
+`generate` produces rows for every `lab` and `project` table from a seed: the same
+arguments always give the same rows. Lab sizes and project staffing follow a
+Zipf-like distribution, so that a few labs have many members as in real
+deployments. `populate` inserts the rows with chunked multi-row inserts.
+
+Usage:
+    python -m element_lab.synthetic --lab-schema test_lab \
+        --project-schema test_project --users 100000 --seed 0
+"""
+
+import argparse
+import itertools
+import logging
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from .load import insert_chunked
+from .utils import element_lab_tables, varchar_length
+
+logger = logging.getLogger("datajoint")
+
+USER_ROLES = ("PI", "Lab Manager", "Postdoc", "Graduate Student", "Technician")
+PROTOCOL_TYPES = ("IACUC", "IRB", "Experimental")
+TIME_ZONES = (
+    "America/New_York",
+    "America/Los_Angeles",
+    "Europe/London",
+    "Europe/Berlin",
+    "Asia/Tokyo",
+    "UTC-5",
+    "UTC+1",
+)
+MODALITIES = ("Ephys", "Imaging", "Behavior", "Histology")
+_FIRST_NAMES = (
+    "Ada",
+    "Alan",
+    "Grace",
+    "Karl",
+    "Marie",
+    "Niels",
+    "Rosalind",
+    "Santiago",
+)
+_LAST_NAMES = ("Cajal", "Curie", "Franklin", "Hopper", "Lovelace", "Turing", "Bohr")
+_WORDS = (
+    "cortex",
+    "memory",
+    "navigation",
+    "decision",
+    "vision",
+    "olfaction",
+    "plasticity",
+    "sleep",
+    "motor",
+    "learning",
+)
+
+
+def _zipf_weights(n: int, exponent: float) -> list:
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+def generate(
+    n_users: int = 1000,
+    n_labs: int = None,
+    n_organizations: int = None,
+    n_projects: int = None,
+    seed: int = 0,
+    skew: float = 1.1,
+    include_project: bool = True,
+    include_deprecated: bool = False,
+) -> dict:
+    """Generate rows for the element_lab tables.
+
+    Args:
+        n_users (int): Number of users. Defaults to 1000.
+        n_labs (int, optional): Number of labs. Defaults to one per 50 users.
+        n_organizations (int, optional): Number of organizations. Defaults to one
+            per 4 labs.
+        n_projects (int, optional): Number of projects. Defaults to one per 20
+            users.
+        seed (int): Seed of the random generator.
+        skew (float): Zipf exponent of lab sizes and project staffing; 0 for
+            uniform.
+        include_project (bool): When True (default), include rows for the
+            `project` schema.
+        include_deprecated (bool): When True, include the same projects in the
+            deprecated `lab.Project*` tables.
+
+    Returns:
+        dict: Qualified table name, e.g., 'lab.Lab.Organization', mapped to a list
+            of row dictionaries, parents before children.
+    """
+    rng = random.Random(seed)
+    n_labs = n_labs or max(1, n_users // 50)
+    n_organizations = n_organizations or max(1, n_labs // 4)
+    n_projects = n_projects or max(1, n_users // 20)
+    labs = [f"lab{i:06d}" for i in range(n_labs)]
+    users = [f"user{i:07d}" for i in range(n_users)]
+    lab_weights = _zipf_weights(n_labs, skew)
+    user_weights = _zipf_weights(n_users, skew / 2)
+    rows = dict()
+
+    rows["lab.Organization"] = [
+        dict(
+            organization=f"org{i:06d}",
+            org_name=f"{rng.choice(_LAST_NAMES)} Institute {i}",
+            org_address=f"{rng.randint(1, 999)} University Ave",
+        )
+        for i in range(n_organizations)
+    ]
+    rows["lab.Lab"] = [
+        dict(
+            lab=name,
+            lab_name=f"{rng.choice(_LAST_NAMES)} Lab of {rng.choice(_WORDS).title()}",
+            address=f"{rng.randint(1, 999)} Science Dr, Room {i}",
+            time_zone=rng.choice(TIME_ZONES),
+        )
+        for i, name in enumerate(labs)
+    ]
+    rows["lab.Lab.Organization"] = [
+        dict(lab=name, organization=f"org{j:06d}")
+        for i, name in enumerate(labs)
+        for j in sorted(
+            {i % n_organizations}
+            | {rng.randrange(n_organizations) for _ in range(rng.choice((0, 0, 1, 2)))}
+        )
+    ]
+    rows["lab.Location"] = [
+        dict(lab=name, location=location, location_description=f"{location} of {name}")
+        for name in labs
+        for location in ("Vivarium", f"Rig {rng.randint(1, 9)}")
+    ]
+    rows["lab.UserRole"] = [dict(user_role=role) for role in USER_ROLES]
+    rows["lab.User"] = []
+    for name in users:
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        rows["lab.User"].append(
+            dict(
+                user=name,
+                user_email=f"{first}.{last}.{name}@example.org".lower(),
+                user_cellphone=f"555-{rng.randint(0, 9999):04d}",
+                user_fullname=f"{first} {last}",
+            )
+        )
+    rows["lab.LabMembership"] = []
+    for name in users:
+        n_memberships = rng.choices((1, 2, 3), weights=(80, 15, 5))[0]
+        for lab_name in sorted(
+            set(rng.choices(labs, cum_weights=lab_weights, k=n_memberships))
+        ):
+            rows["lab.LabMembership"].append(
+                dict(lab=lab_name, user=name, user_role=rng.choice(USER_ROLES))
+            )
+    rows["lab.ProtocolType"] = [dict(protocol_type=t) for t in PROTOCOL_TYPES]
+    n_protocols = max(1, n_labs * 2)
+    protocols = [f"protocol{i:06d}" for i in range(n_protocols)]
+    rows["lab.Protocol"] = [
+        dict(
+            protocol=name,
+            protocol_type=rng.choice(PROTOCOL_TYPES),
+            protocol_description=f"Protocol for {rng.choice(_WORDS)} experiments",
+        )
+        for name in protocols
+    ]
+    rows["lab.Source"] = [
+        dict(source=f"source{i:04d}", source_name=f"Supplier {i}")
+        for i in range(max(1, n_labs // 10))
+    ]
+    rows["lab.Device"] = [
+        dict(device=f"device{i:06d}", modality=rng.choice(MODALITIES))
+        for i in range(n_labs)
+    ]
+    if not (include_project or include_deprecated):
+        return rows
+
+    project_rows = dict()
+    projects = [f"project{i:06d}" for i in range(n_projects)]
+    start_dates = {
+        name: date(2010, 1, 1) + timedelta(days=rng.randrange(14 * 365))
+        for name in projects
+    }
+    project_rows["project.Project"] = [
+        dict(
+            project=name,
+            project_title=f"{rng.choice(_WORDS).title()} and {rng.choice(_WORDS)}",
+            project_start_date=start_dates[name],
+            project_end_date=(
+                start_dates[name] + timedelta(days=rng.randrange(365, 5 * 365))
+                if rng.random() < 0.5
+                else None
+            ),
+        )
+        for name in projects
+    ]
+    project_rows["project.ProjectPersonnel"] = [
+        dict(project=name, user=user)
+        for name in projects
+        for user in sorted(
+            set(rng.choices(users, cum_weights=user_weights, k=rng.randint(1, 10)))
+        )
+    ]
+    project_rows["project.ProjectKeywords"] = [
+        dict(project=name, keyword=keyword)
+        for name in projects
+        for keyword in rng.sample(_WORDS, rng.randint(1, 4))
+    ]
+    project_rows["project.ProjectPublication"] = [
+        dict(project=name, publication=f"{rng.choice(_LAST_NAMES)} et al. {year}")
+        for name in projects
+        for year in sorted(set(rng.choices(range(2010, 2025), k=rng.randint(0, 3))))
+    ]
+    project_rows["project.ProjectSourceCode"] = [
+        dict(
+            project=name,
+            repository_url=f"https://github.com/example/{name}",
+            repository_name=name,
+        )
+        for name in projects
+        if rng.random() < 0.5
+    ]
+    studies = [
+        (name, f"aim{i}") for name in projects for i in range(1, rng.randint(1, 5) + 1)
+    ]
+    project_rows["project.Study"] = [
+        dict(project=name, study=study, study_name=f"{study} of {name}")
+        for name, study in studies
+    ]
+    project_rows["project.Study.Protocol"] = [
+        dict(project=name, study=study, protocol=protocol)
+        for name, study in studies
+        for protocol in rng.sample(protocols, min(len(protocols), rng.randint(0, 2)))
+    ]
+    experiment_ids = itertools.count()
+    project_rows["project.Experiment"] = [
+        dict(
+            experiment=f"exp{next(experiment_ids):08d}",
+            project=name,
+            study=study,
+            lab=rng.choices(labs, cum_weights=lab_weights)[0],
+            protocol=rng.choice(protocols) if rng.random() < 0.7 else None,
+        )
+        for name, study in studies
+        for _ in range(rng.randint(1, 10))
+    ]
+    if include_project:
+        rows.update(project_rows)
+    if include_deprecated:
+        rows["lab.Project"] = [
+            dict(project=row["project"], project_description=row["project_title"])
+            for row in project_rows["project.Project"]
+        ]
+        for name in ("ProjectKeywords", "ProjectPublication", "ProjectSourceCode"):
+            rows[f"lab.{name}"] = project_rows[f"project.{name}"]
+        rows["lab.ProjectUser"] = project_rows["project.ProjectPersonnel"]
+    return rows
+
+
+def _fit(table, rows: list) -> list:
+    """Truncate strings to the varchar lengths of the table."""
+    limits = {
+        name: varchar_length(attribute)
+        for name, attribute in table.heading.attributes.items()
+        if attribute.type.startswith("varchar")
+    }
+    for row in rows:
+        for name, length in limits.items():
+            value = row.get(name)
+            if isinstance(value, str) and len(value) > length:
+                row[name] = value[:length]
+    return rows
+
+
+def populate(chunk_size: int = 5000, **kwargs) -> dict:
+    """Generate rows with `generate` and insert them into the activated schemas.
+
+    Existing rows with the same primary keys are kept, so that the call can be
+    repeated with a larger `n_users` to grow a database.
+
+    Args:
+        chunk_size (int): Maximum number of rows per INSERT statement.
+        **kwargs: Arguments of `generate`.
+
+    Returns:
+        dict: Rows inserted per table, total rows and seconds.
+    """
+    from . import project
+
+    kwargs.setdefault("include_project", project.schema.is_activated())
+    tables = element_lab_tables()
+    start_time = time.perf_counter()
+    report = dict(tables=dict())
+    for name, rows in generate(**kwargs).items():
+        table = tables[name]
+        report["tables"][name] = insert_chunked(
+            table, _fit(table, rows), chunk_size=chunk_size
+        )
+        logger.info(f"Inserted {len(rows)} rows into {name}")
+    report["rows"] = sum(report["tables"].values())
+    report["seconds"] = time.perf_counter() - start_time
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lab-schema", required=True)
+    parser.add_argument("--project-schema")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--labs", type=int)
+    parser.add_argument("--organizations", type=int)
+    parser.add_argument("--projects", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--deprecated", action="store_true", help="Fill lab.Project*.")
+    args = parser.parse_args(argv)
+
+    from . import lab, project
+
+    lab.activate(args.lab_schema)
+    if args.project_schema:
+        project.activate(args.project_schema, linking_module=lab)
+    report = populate(
+        chunk_size=args.chunk_size,
+        n_users=args.users,
+        n_labs=args.labs,
+        n_organizations=args.organizations,
+        n_projects=args.projects,
+        seed=args.seed,
+        skew=args.skew,
+        include_deprecated=args.deprecated,
+    )
+    print(
+        f"Inserted {report['rows']} rows in {report['seconds']:.1f} s"
+        f" ({report['rows'] / report['seconds']:.0f} rows/sec)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Time zones of labs and localization of session timestamps.
+
+`lab.Lab.time_zone` holds either a 'UTC±X' offset, e.g., 'UTC-5' or 'UTC+05:30',
+or an IANA time zone name, e.g., 'America/New_York'. The values of all labs are
+fetched and parsed once and cached until `lab.Lab` is modified through
+element_lab. `localize` converts arrays of naive local session timestamps to UTC
+with one vectorized operation per distinct time zone, so that they can be used as
+tz-aware NWB `session_start_time`.
+"""
+
+import datetime
+import functools
+import re
+import threading
+from contextlib import contextmanager
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+
+from . import lab
+from .utils import add_table_method_hook
+
+_UTC_OFFSET = re.compile(r"^UTC(?:([+-])(\d{1,2})(?::?(\d{2}))?)?$")
+_MAX_OFFSET = datetime.timedelta(hours=14)  # range of offsets in use (ISO 8601)
+_INVALIDATING_METHODS = ("insert", "delete", "delete_quick", "update1")
+
+_lab_zones = None  # lab -> (time_zone, tzinfo or error message)
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def parse_time_zone(time_zone: str) -> datetime.tzinfo:
+    """Parse a value of `lab.Lab.time_zone`.
+
+    Args:
+        time_zone (str): 'UTC±X' offset, e.g., 'UTC-5' or 'UTC+05:30', or IANA time
+            zone name, e.g., 'America/New_York'.
+
+    Returns:
+        datetime.tzinfo: `datetime.timezone` for offsets, `zoneinfo.ZoneInfo` for
+            IANA names.
+
+    Raises:
+        ValueError: If the value is neither a valid offset nor a known time zone,
+            or if the offset exceeds ±14 hours.
+    """
+    value = time_zone.strip()
+    match = _UTC_OFFSET.match(value)
+    if match:
+        sign, hours, minutes = match.groups()
+        if sign is None:
+            return datetime.timezone.utc
+        if int(minutes or 0) >= 60:
+            raise ValueError(f"Invalid minutes in time zone {time_zone!r}.")
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes or 0))
+        if offset > _MAX_OFFSET:
+            raise ValueError(f"Time zone offset {time_zone!r} exceeds ±14 hours.")
+        return datetime.timezone(-offset if sign == "-" else offset)
+    try:
+        return ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(
+            f"Time zone {time_zone!r} is neither 'UTC±X' nor an IANA time zone name."
+        )
+
+
+def _parse(time_zone: str):
+    """Parsed time zone, or the error message if it is invalid."""
+    try:
+        return parse_time_zone(time_zone)
+    except ValueError as error:
+        return str(error)
+
+
+@contextmanager
+def _invalidate(table_name: str, method_name: str):
+    """Table method hook clearing the cached time zones when `lab.Lab` changes."""
+    global _lab_zones
+    try:
+        yield
+    finally:
+        if table_name == "lab.Lab":
+            _lab_zones = None
+
+
+def _load_lab_zones() -> dict:
+    global _lab_zones
+    lab_zones = _lab_zones
+    if lab_zones is not None:
+        return lab_zones
+    with _lock:
+        if _lab_zones is None:
+            for method_name in _INVALIDATING_METHODS:
+                add_table_method_hook(method_name, _invalidate)
+            labs, time_zones = lab.Lab.fetch("lab", "time_zone")
+            parsed = {value: _parse(value) for value in set(time_zones)}
+            _lab_zones = {
+                name: (value, parsed[value]) for name, value in zip(labs, time_zones)
+            }
+        return _lab_zones
+
+
+def clear_time_zone_cache():
+    """Forget the cached time zones, e.g., after modifying labs outside element_lab."""
+    global _lab_zones
+    _lab_zones = None
+
+
+def lab_time_zones() -> dict:
+    """Time zones of all labs, fetched with one query and cached.
+
+    Returns:
+        dict: Lab name mapped to its `datetime.tzinfo`. Labs with invalid time zones
+            are left out; see `invalid_time_zones`.
+    """
+    return {
+        name: zone
+        for name, (_, zone) in _load_lab_zones().items()
+        if not isinstance(zone, str)
+    }
+
+
+def invalid_time_zones() -> pd.DataFrame:
+    """Labs whose time zone cannot be used for NWB session start times.
+
+    Returns:
+        pandas.DataFrame: Columns lab, time_zone and reason, one row per lab.
+    """
+    return pd.DataFrame(
+        [
+            dict(lab=name, time_zone=value, reason=zone)
+            for name, (value, zone) in _load_lab_zones().items()
+            if isinstance(zone, str)
+        ],
+        columns=["lab", "time_zone", "reason"],
+    )
+
+
+def localize(
+    timestamps, labs, ambiguous: str = "raise", nonexistent: str = "raise"
+) -> pd.DatetimeIndex:
+    """Convert naive local timestamps of sessions to UTC using each lab's time zone.
+
+    Fixed offsets are subtracted with datetime64 arithmetic and IANA time zones are
+    localized with pandas, each with one vectorized operation per distinct zone.
+
+    Args:
+        timestamps (array-like): Naive timestamps in the local time of the lab.
+        labs (str | array-like): Lab of each timestamp, or one lab for all.
+        ambiguous (str): Handling of times repeated at the end of daylight saving
+            time, passed to `pandas.DatetimeIndex.tz_localize`. Defaults to 'raise'.
+        nonexistent (str): Handling of times skipped at the start of daylight
+            saving time, passed to `pandas.DatetimeIndex.tz_localize`. Defaults to
+            'raise'.
+
+    Returns:
+        pandas.DatetimeIndex: tz-aware UTC timestamps in the order of `timestamps`.
+            Missing timestamps stay NaT.
+
+    Raises:
+        ValueError: If a lab does not exist or has an invalid time zone.
+    """
+    values = pd.DatetimeIndex(np.asarray(timestamps, dtype="datetime64[ns]"))
+    assert values.tz is None, "Timestamps must be naive local times."
+    values = values.values
+    codes, unique_labs = pd.factorize(
+        np.broadcast_to(np.asarray(labs, dtype=object), values.shape)
+    )
+    assert (codes >= 0).all(), "Every timestamp needs a lab."
+    lab_zones = _load_lab_zones()
+    unknown = [name for name in unique_labs if name not in lab_zones]
+    if unknown:
+        raise ValueError(f"Unknown labs: {unknown}")
+    invalid = {
+        name: lab_zones[name][1]
+        for name in unique_labs
+        if isinstance(lab_zones[name][1], str)
+    }
+    if invalid:
+        raise ValueError(f"Labs with invalid time zones: {invalid}")
+
+    zones = [lab_zones[name][1] for name in unique_labs]
+    zone_codes, unique_zones = pd.factorize(np.array([str(z) for z in zones]))
+    zone_of_lab = dict(zip(zone_codes, zones))
+    codes = zone_codes[codes]
+
+    result = np.empty(values.shape, dtype="datetime64[ns]")
+    for code in range(len(unique_zones)):
+        zone = zone_of_lab[code]
+        mask = codes == code
+        if isinstance(zone, datetime.timezone):
+            result[mask] = values[mask] - np.timedelta64(zone.utcoffset(None))
+        else:
+            result[mask] = (
+                pd.DatetimeIndex(values[mask])
+                .tz_localize(zone, ambiguous=ambiguous, nonexistent=nonexistent)
+                .tz_convert("UTC")
+                .tz_localize(None)
+                .values
+            )
+    return pd.DatetimeIndex(result).tz_localize("UTC")
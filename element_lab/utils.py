@@ -0,0 +1,212 @@
+"""Utilities shared across element_lab modules."""
+
+import contextlib
+import functools
+import inspect
+import re
+
+import datajoint as dj
+from pymysql.converters import escape_item
+
+
+def element_lab_tables(modules: tuple = None) -> dict:
+    """List the table classes of element_lab schemas, including part tables.
+
+    Args:
+        modules (tuple, optional): Schema modules to list. Defaults to `lab` and
+            `project`.
+
+    Returns:
+        dict: Qualified table name (e.g., 'lab.Lab.Organization') mapped to the
+            table class, in declaration order.
+    """
+    if modules is None:
+        from . import lab, project
+
+        modules = (lab, project)
+    tables = dict()
+    for module in modules:
+        module_name = module.__name__.rsplit(".", 1)[-1]
+        for name, cls in vars(module).items():
+            if (
+                inspect.isclass(cls)
+                and issubclass(cls, dj.Table)
+                and cls.__module__ == module.__name__
+            ):
+                tables[f"{module_name}.{name}"] = cls
+                for part_name, part in vars(cls).items():
+                    if inspect.isclass(part) and issubclass(part, dj.Part):
+                        tables[f"{module_name}.{name}.{part_name}"] = part
+    return tables
+
+
+_method_hooks = dict()  # method name -> list of hooks
+_argument_hooks = set()  # hooks also called with the arguments of the method
+_hooked_methods = set()  # (table class, method name) already wrapped
+
+
+def _call_with_hooks(table_name: str, method_name: str, function, args, kwargs):
+    hooks = _method_hooks.get(method_name)
+    if not hooks:
+        return function(*args, **kwargs)
+    args = list(args)  # argument hooks may replace arguments
+    with contextlib.ExitStack() as stack:
+        for hook in list(hooks):
+            if hook in _argument_hooks:
+                stack.enter_context(hook(table_name, method_name, args, kwargs))
+            else:
+                stack.enter_context(hook(table_name, method_name))
+        return function(*args, **kwargs)
+
+
+class _HookedCall:
+    """Callable returned by hooked properties, e.g., `fetch`, running the hooks
+    around calls and forwarding everything else to the original object."""
+
+    def __init__(self, target, table_name: str, method_name: str):
+        self._target = target
+        self._table_name = table_name
+        self._method_name = method_name
+
+    def __call__(self, *args, **kwargs):
+        return _call_with_hooks(
+            self._table_name, self._method_name, self._target, args, kwargs
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+def _hooked(table_name: str, method_name: str, method):
+    """Wrap a table method so that the registered hooks run around each call.
+
+    DataJoint implements `fetch` and `fetch1` as properties returning callables;
+    these are wrapped so that calling the returned object runs the hooks.
+    """
+    if isinstance(method, property):
+        return property(
+            lambda self: _HookedCall(method.fget(self), table_name, method_name),
+            doc=method.__doc__,
+        )
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return _call_with_hooks(table_name, method_name, method, args, kwargs)
+
+    return wrapper
+
+
+def add_table_method_hook(method_name: str, hook, with_arguments: bool = False):
+    """Run `hook` around a method, e.g., 'insert', of all element_lab tables.
+
+    Methods are wrapped once and call the hooks registered at call time, so hooks
+    of independent features can be added and removed in any order.
+
+    Args:
+        method_name (str): Name of the table method, e.g., 'insert' or 'fetch'.
+        hook (callable): Called as `hook(table_name, method_name)` and returning a
+            context manager entered around the method call.
+        with_arguments (bool): When True, `hook` is called as
+            `hook(table_name, method_name, args, kwargs)` with the list of
+            positional arguments of the method call, the table itself first, and
+            the keyword arguments. Changes to them, e.g., materializing a
+            generator, are passed on to the method.
+    """
+    hooks = _method_hooks.setdefault(method_name, [])
+    if hook not in hooks:
+        hooks.append(hook)
+    if with_arguments:
+        _argument_hooks.add(hook)
+    for table_name, table in element_lab_tables().items():
+        if (table, method_name) in _hooked_methods:
+            continue
+        # getattr would return a method bound to a new instance (dj.TableMeta)
+        method = inspect.getattr_static(table, method_name, None)
+        if method is not None:
+            setattr(table, method_name, _hooked(table_name, method_name, method))
+            _hooked_methods.add((table, method_name))
+
+
+def remove_table_method_hook(method_name: str, hook):
+    """Stop running a hook added with `add_table_method_hook`."""
+    hooks = _method_hooks.get(method_name, [])
+    if hook in hooks:
+        hooks.remove(hook)
+    if not any(hook in hooks for hooks in _method_hooks.values()):
+        _argument_hooks.discard(hook)
+
+
+def run_with_table_hooks(table, method_name: str, function, *args, **kwargs):
+    """Run `function` with the hooks of a table method, e.g., for statements that
+    change an element_lab table as the method would, without calling it.
+
+    Args:
+        table (dj.Table): element_lab table class or instance, passed to the hooks
+            as the first argument of the method, followed by `args`.
+        method_name (str): Name of the table method, e.g., 'insert'.
+        function (callable): Called as `function(*args, **kwargs)`.
+
+    Returns:
+        The result of `function`.
+    """
+    table_class = table if inspect.isclass(table) else type(table)
+    table_name = next(
+        (name for name, cls in element_lab_tables().items() if cls is table_class),
+        None,
+    )
+    if table_name is None:
+        return function(*args, **kwargs)
+    return _call_with_hooks(
+        table_name,
+        method_name,
+        lambda _, *args, **kwargs: function(*args, **kwargs),
+        (table, *args),
+        kwargs,
+    )
+
+
+def after_key(primary_key: list, last_key: list) -> str:
+    """Restriction selecting the rows after `last_key` in primary-key order.
+
+    Used for keyset pagination: each page is an index range scan starting after the
+    last primary key of the previous page. The values are escaped by the database
+    driver.
+
+    Args:
+        primary_key (list): Primary key attribute names.
+        last_key (list): Values of the primary key attributes of the last row.
+
+    Returns:
+        str: Restriction of the table, e.g., "(`lab`) > ('lab12')".
+    """
+    return "({}) > ({})".format(
+        ", ".join(f"`{k}`" for k in primary_key),
+        ", ".join(escape_item(v, "utf8") for v in last_key),
+    )
+
+
+def varchar_length(attribute) -> int:
+    """Maximum length of a varchar attribute.
+
+    Args:
+        attribute (dj.heading.Attribute): Attribute of a table heading.
+
+    Returns:
+        int: The declared length, or None if the attribute is not a varchar.
+    """
+    match = re.match(r"varchar\((\d+)\)", attribute.type)
+    return int(match.group(1)) if match else None
+
+
+def like_prefix(prefix: str) -> str:
+    """Quoted LIKE pattern matching strings that start with `prefix`.
+
+    Args:
+        prefix (str): Literal prefix; wildcards and quotes in it are escaped.
+
+    Returns:
+        str: Pattern for a restriction, e.g., `f"keyword LIKE {like_prefix('vis')}"`.
+    """
+    for character in ("\\", "%", "_", '"'):
+        prefix = prefix.replace(character, "\\" + character)
+    return f'"{prefix}%"'
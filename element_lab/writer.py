@@ -0,0 +1,233 @@
+"""Write-behind buffering of inserts into element_lab tables.
+
+`BufferedWriter` collects rows inserted with `insert1` or `insert`, e.g., as
+acquisition rigs register experiments, and writes them from a background thread
+with one multi-row INSERT per table once `max_rows` rows are buffered or the oldest
+row has waited `max_delay` seconds. Tables are written in declaration order, parents
+before children, so that rows referencing rows buffered earlier satisfy their
+foreign keys.
+
+If a multi-row INSERT fails, its rows are inserted one at a time to isolate the
+failing rows, which are reported in `BufferedWriter.failures` and to the optional
+`on_error` callback; the other rows are written.
+
+The background thread writes on its own connection, opened with
+`connection.thread_connections`, so that the application can keep querying and
+inserting on the schema connection while a flush runs.
+
+Example:
+    ```python
+    with BufferedWriter(max_rows=500, max_delay=0.5) as writer:
+        writer.insert1(project.Study, study)
+        writer.insert1(project.Experiment, experiment)
+    ```
+"""
+
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from .connection import ThreadLocalConnection, thread_connections
+from .utils import element_lab_tables
+
+logger = logging.getLogger("datajoint")
+
+
+class BufferedWriter:
+    """Buffer inserts into element_lab tables and write them in batches.
+
+    Args:
+        max_rows (int): Number of buffered rows that triggers a write, and the
+            maximum number of rows per INSERT statement. Defaults to 1000.
+        max_delay (float): Maximum seconds a row stays buffered. Defaults to 1.
+        skip_duplicates (bool): When True, rows whose primary key already exists
+            are skipped rather than reported as failures. Defaults to False.
+        on_error (callable, optional): Called as `on_error(table_name, row, error)`
+            for each row that could not be inserted, from the writing thread.
+            Exceptions raised by the callback are logged and do not stop the write.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 1000,
+        max_delay: float = 1.0,
+        skip_duplicates: bool = False,
+        on_error=None,
+    ):
+        from . import lab, project
+
+        assert max_rows > 0, "max_rows must be a positive integer."
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.skip_duplicates = skip_duplicates
+        self.on_error = on_error
+        self._tables = element_lab_tables(
+            tuple(m for m in (lab, project) if m.schema.is_activated())
+        )
+        self._names = {table: name for name, table in self._tables.items()}
+        self._buffers = {name: [] for name in self._tables}  # parents first
+        self._pending = 0
+        self._oldest = None  # time the oldest buffered row was added
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self.failures = []  # dict(table, row, error) per row that was not inserted
+        self.rows = 0
+        self.statements = 0
+        self.flushes = 0
+        self._exit_stack = ExitStack()
+        self._proxy = self._exit_stack.enter_context(thread_connections())
+        self._started = threading.Event()
+        self._start_error = None
+        self._thread = threading.Thread(
+            target=self._run, name="element_lab BufferedWriter", daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._exit_stack.close()
+            raise self._start_error
+
+    def insert(self, table, rows: list):
+        """Buffer rows for insertion.
+
+        Args:
+            table (dj.Table | str): element_lab table class or qualified name,
+                e.g., 'project.Experiment'.
+            rows (list): Row dictionaries.
+        """
+        name = table if isinstance(table, str) else self._names.get(table)
+        assert name in self._buffers, f"{table} is not an activated element_lab table."
+        rows = [dict(row) for row in rows]
+        with self._condition:
+            assert not self._closed, "The writer is closed."
+            if self._oldest is None:  # start the max_delay timer
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            self._buffers[name].extend(rows)
+            self._pending += len(rows)
+            if self._pending >= self.max_rows:
+                self._condition.notify()
+
+    def insert1(self, table, row: dict):
+        """Buffer one row for insertion."""
+        self.insert(table, [row])
+
+    def _run(self):
+        connection = None
+        try:
+            if isinstance(self._proxy, ThreadLocalConnection):
+                connection = self._proxy.open()  # pooled proxies lease per query
+        except Exception as error:
+            self._start_error = error
+            return
+        finally:
+            self._started.set()
+        try:
+            self._write_until_closed()
+        finally:
+            if connection is not None:
+                self._proxy.release([connection])
+
+    def _write_until_closed(self):
+        while True:
+            with self._condition:
+                while not self._closed and self._pending < self.max_rows:
+                    if self._oldest is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self.max_delay - (time.monotonic() - self._oldest)
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed and not self._pending:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("BufferedWriter failed to write buffered rows.")
+
+    def _fail(self, name: str, row: dict, error: Exception):
+        logger.warning(f"Could not insert into {name}: {error}")
+        self.failures.append(dict(table=name, row=row, error=error))
+        if self.on_error is not None:
+            try:
+                self.on_error(name, row, error)
+            except Exception:  # the remaining rows must still be written
+                logger.exception(f"BufferedWriter on_error callback failed for {name}")
+
+    def _write(self, name: str, rows: list):
+        table = self._tables[name]
+        for start in range(0, len(rows), self.max_rows):
+            chunk = rows[start : start + self.max_rows]
+            try:
+                table.insert(chunk, skip_duplicates=self.skip_duplicates)
+                self.statements += 1
+                self.rows += len(chunk)
+                continue
+            except Exception as error:
+                logger.debug(
+                    f"Batch insert into {name} failed ({error}), retrying rows"
+                )
+            for row in chunk:
+                try:
+                    table.insert1(row, skip_duplicates=self.skip_duplicates)
+                    self.rows += 1
+                except Exception as error:
+                    self._fail(name, row, error)
+                self.statements += 1
+
+    def flush(self) -> int:
+        """Write all buffered rows now, parents before children.
+
+        Returns:
+            int: Number of rows taken from the buffer.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batches = [(name, rows) for name, rows in self._buffers.items() if rows]
+                self._buffers = {name: [] for name in self._tables}
+                n_rows, self._pending, self._oldest = self._pending, 0, None
+            for name, rows in batches:
+                self._write(name, rows)
+            if n_rows:
+                self.flushes += 1
+        return n_rows
+
+    def close(self):
+        """Write the buffered rows and stop the background thread and its connection."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self._exit_stack.close()
+
+    def info(self) -> dict:
+        """Number of buffered, written and failed rows, statements and flushes."""
+        with self._condition:
+            pending = self._pending
+        return dict(
+            pending=pending,
+            rows=self.rows,
+            failures=len(self.failures),
+            statements=self.statements,
+            flushes=self.flushes,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return (
+            f"BufferedWriter(max_rows={self.max_rows}, max_delay={self.max_delay},"
+            f" {self.info()['pending']} rows pending)"
+        )
@@ -0,0 +1,53 @@
+"""Fixtures for tests against a MySQL server.
+
+Start a server with `docker compose -f benchmarks/docker-compose.yaml up -d`, or
+point `DJ_HOST`, `DJ_USER` and `DJ_PASS` to another one. Tests requesting the
+`schemas` fixture are skipped when no server is reachable.
+"""
+
+import os
+
+import datajoint as dj
+import pytest
+
+PREFIX = os.getenv("DJ_TEST_PREFIX", "test_element_lab_")
+
+
+@pytest.fixture(scope="session")
+def connection():
+    dj.config["database.host"] = os.getenv("DJ_HOST", "localhost")
+    dj.config["database.user"] = os.getenv("DJ_USER", "root")
+    dj.config["database.password"] = os.getenv("DJ_PASS", "benchmark")
+    try:
+        connection = dj.conn(reset=True)
+    except Exception as error:
+        pytest.skip(f"No database server: {error}")
+    return connection
+
+
+@pytest.fixture(scope="session")
+def schemas(connection):
+    """The `lab` and `project` modules, activated and filled with synthetic rows."""
+    from element_lab import lab, project, synthetic
+
+    lab.activate(f"{PREFIX}lab")
+    project.activate(f"{PREFIX}project", linking_module=lab, track_summary=True)
+    synthetic.populate(n_users=100, seed=0)
+    yield lab, project
+    project.schema.drop(force=True)
+    lab.schema.drop(force=True)
+
+
+@pytest.fixture(scope="session")
+def keys(schemas):
+    """Keys of a lab with one organization, a project with keywords and a protocol."""
+    lab, project = schemas
+    return dict(
+        lab_key=(lab.Lab.aggr(lab.Lab.Organization, n="count(*)") & "n = 1").fetch(
+            "KEY", limit=1
+        )[0],
+        project_key=(project.Project & project.ProjectKeywords).fetch("KEY", limit=1)[
+            0
+        ],
+        protocol_key=lab.Protocol.fetch("KEY", limit=1)[0],
+    )
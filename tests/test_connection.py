@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from element_lab import connection
+from element_lab.export import (
+    element_lab_to_nwb_dict,
+    element_lab_to_nwb_dicts_async,
+    element_lab_to_nwb_dicts_threaded,
+)
+
+
+def test_overlapping_async_exports(schemas, keys):
+    lab, _ = schemas
+    original = lab.schema.connection
+    expected = element_lab_to_nwb_dict(**keys)
+
+    async def export(n_sessions):
+        return await element_lab_to_nwb_dicts_async(
+            **{name: [key] * n_sessions for name, key in keys.items()},
+            max_concurrency=4,
+        )
+
+    async def overlapping():
+        # the short call finishes while the long one still runs on its connections
+        return await asyncio.gather(export(2), export(200))
+
+    short, long = asyncio.run(overlapping())
+    assert short == [expected] * 2
+    assert long == [expected] * 200
+    assert connection._proxy is None
+    assert lab.schema.connection is original
+
+
+def test_nested_thread_connections(schemas, keys):
+    lab, _ = schemas
+    original = lab.schema.connection
+    with connection.thread_connections() as outer:
+        with connection.thread_connections() as inner:
+            assert inner is outer
+        assert lab.schema.connection is outer  # still bound for the outer block
+        assert element_lab_to_nwb_dicts_threaded(**{k: [v] for k, v in keys.items()})
+        assert lab.schema.connection is outer
+    assert lab.schema.connection is original
+
+
+class _Connection:
+    """Records the arguments of DataJoint 2.x `Connection`, which has no init_fun."""
+
+    def __init__(
+        self, host, user, password, port=None, use_tls=None, *, database_name=None
+    ):
+        self.arguments = dict(
+            host=host,
+            user=user,
+            password=password,
+            port=port,
+            use_tls=use_tls,
+            database_name=database_name,
+        )
+
+
+class _LegacyConnection:
+    """Records the arguments of DataJoint 0.x `Connection`."""
+
+    def __init__(self, host, user, password, port=None, init_fun=None, use_tls=None):
+        self.arguments = dict(
+            host=host,
+            user=user,
+            password=password,
+            port=port,
+            init_fun=init_fun,
+            use_tls=use_tls,
+        )
+
+
+@pytest.mark.parametrize("connection_class", [_Connection, _LegacyConnection])
+def test_connect_like_passes_accepted_arguments(monkeypatch, connection_class):
+    monkeypatch.setattr(connection.dj, "Connection", connection_class)
+    template = SimpleNamespace(
+        conn_info=dict(
+            host="db",
+            port=3306,
+            user="u",
+            passwd="p",
+            ssl_input=None,
+            database_name=None,
+        ),
+        schemas=dict(lab="schema"),
+    )
+    opened = connection._connect_like(template)
+    assert opened.arguments["host"] == "db"
+    assert opened.arguments["password"] == "p"
+    assert opened.arguments.get("init_fun") is None
+    assert opened.schemas is template.schemas
+
+
+class _PooledConnection:
+    _in_transaction = False
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, sql):
+        self.queries.append(sql)
+
+
+def test_pool_leases_only_for_method_calls(monkeypatch):
+    monkeypatch.setattr(connection, "_connect_like", lambda _: _PooledConnection())
+    template = SimpleNamespace(conn_info=dict(host="db"))
+    pool = connection.ConnectionPool(template, max_size=1)
+    assert pool.conn_info is template.conn_info
+    assert pool.info()["size"] == 0
+
+    pool.query("SELECT 1")
+    assert pool.info() == dict(
+        max_size=1, size=1, idle=1, in_use=0, waits=0, reconnects=0
+    )
+    with pool.lease() as leased:
+        assert pool._in_transaction is leased._in_transaction
+        assert leased.queries == ["SELECT 1"]
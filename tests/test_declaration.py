@@ -0,0 +1,37 @@
+import pytest
+
+from element_lab import declaration
+from element_lab.utils import element_lab_tables
+
+pytestmark = pytest.mark.skipif(
+    not declaration.prefetch_supported(),
+    reason="Heading prefetch is not supported with this DataJoint version",
+)
+
+
+def _headings(module) -> dict:
+    return {
+        name: vars(table)["_heading"]
+        for name, table in element_lab_tables((module,)).items()
+    }
+
+
+def _describe(heading) -> tuple:
+    return (
+        {name: attribute.todict() for name, attribute in heading.attributes.items()},
+        heading.indexes,
+        heading.table_status["comment"],
+    )
+
+
+def test_prefetched_headings_match_lazy(schemas):
+    for module in schemas:
+        headings = _headings(module)
+        for heading in headings.values():
+            heading._attributes = None
+        assert declaration.prefetch_headings(module) == len(headings)
+        prefetched = {name: _describe(h) for name, h in headings.items()}
+
+        for heading in headings.values():
+            heading._attributes = None  # load again with DataJoint's own queries
+        assert {name: _describe(h) for name, h in headings.items()} == prefetched
@@ -0,0 +1,73 @@
+import pytest
+
+from element_lab import instrumentation
+from element_lab.export import (
+    disable_cache,
+    element_lab_to_nwb_dict,
+    element_lab_to_nwb_dicts,
+)
+from element_lab.export.nwb import _RowIndex
+
+
+def _legacy_nwb_dict(lab_key, project_key, protocol_key):
+    """The lookups of `element_lab_to_nwb_dict` before single-query validation."""
+    from element_lab import lab, project
+
+    assert len(lab.Lab & lab_key) == 1
+    assert (
+        len(lab.Project & project_key) == 1 or len(project.Project & project_key) == 1
+    )
+    assert len(lab.Protocol & protocol_key) == 1
+    (lab.Lab * lab.Lab.Organization * lab.Organization & lab_key).fetch1()
+    try:
+        (lab.Project & project_key).fetch1()
+    except Exception:  # the deprecated table is empty with the project schema
+        (project.Project & project_key).fetch1("project_title")
+    (project.ProjectKeywords & project_key).fetch("keyword")
+    (project.ProjectPublication & project_key).fetch("publication")
+    (lab.Protocol & protocol_key).fetch1()
+
+
+def _queries(function, **kwargs) -> int:
+    function(**kwargs)  # load the table headings first
+    with instrumentation.collect():
+        with instrumentation.operation("measured") as stats:
+            function(**kwargs)
+    return stats.queries
+
+
+def test_nwb_dict_round_trips(keys):
+    disable_cache()
+    queries = _queries(element_lab_to_nwb_dict, **keys)
+    assert queries == 5  # lab, project, keywords, publications and protocol
+    assert queries < _queries(_legacy_nwb_dict, **keys)
+
+
+def test_nwb_dict_rejects_ambiguous_keys(schemas):
+    with pytest.raises(AssertionError, match="Multiple labs"):
+        element_lab_to_nwb_dict(lab_key="lab LIKE 'lab%'")
+
+
+def test_batched_nwb_dicts_send_distinct_keys(keys):
+    n_sessions = 3000  # more than RESTRICTION_CHUNK_SIZE, but one distinct key each
+    batched = {f"{name}s": [key] * n_sessions for name, key in keys.items()}
+    assert _queries(element_lab_to_nwb_dicts, **batched) == 5
+    assert (
+        element_lab_to_nwb_dicts(**batched)
+        == [element_lab_to_nwb_dict(**keys)] * n_sessions
+    )
+
+
+def test_row_index_matches_like_restrictions():
+    rows = [
+        dict(lab="a", organization="x", lab_name="A"),
+        dict(lab="a", organization="y", lab_name="A"),
+        dict(lab="b", organization="x", lab_name="B"),
+    ]
+    index = _RowIndex(rows, ["lab"])
+    assert index.match(dict(lab="a")) == rows[:2]
+    assert index.match(dict(lab="a", organization="y", session=1)) == [rows[1]]
+    assert index.match(dict(organization="x")) == [rows[0], rows[2]]
+    assert index.match(dict(lab_name="B")) == [rows[2]]
+    assert index.match(dict(lab="c")) == []
+    assert index.match(dict(session=1)) == rows
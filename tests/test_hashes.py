@@ -0,0 +1,27 @@
+import json
+
+from element_lab.export import hashes
+from element_lab.export.nwb import group_values
+
+
+def test_group_values_by_parent_key():
+    rows = [
+        dict(project="a", keyword="x"),
+        dict(project="b", keyword="y"),
+        dict(project="a", keyword="z"),
+    ]
+    assert group_values(rows, ["project"], "keyword") == {
+        ("a",): ["x", "z"],
+        ("b",): ["y"],
+    }
+
+
+def test_manifest_keeps_empty_hashes(tmp_path, monkeypatch):
+    def content_hashes():
+        raise AssertionError("hashes were given")
+
+    monkeypatch.setattr(hashes, "content_hashes", content_hashes)
+    path = tmp_path / "manifest.json"
+    manifest = hashes.write_manifest(path, hashes=dict())
+    assert manifest["hashes"] == dict()
+    assert json.loads(path.read_text())["hashes"] == dict()
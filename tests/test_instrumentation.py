@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from element_lab import connection, instrumentation
+
+
+@pytest.fixture
+def query(monkeypatch):
+    """Stand-in for `dj.Connection.query` returning cursors with a row count."""
+    monkeypatch.setattr(
+        instrumentation,
+        "_original_query",
+        lambda self, query, args=(): SimpleNamespace(rowcount=3),
+    )
+    return lambda: instrumentation._counting_query(None, "SELECT 1")
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    @contextmanager
+    def thread_connections():
+        yield SimpleNamespace()  # neither a ThreadLocalConnection nor a pool
+
+    monkeypatch.setattr(connection, "thread_connections", thread_connections)
+    return connection.connection_executor
+
+
+def test_counts_rows_of_cursors(query):
+    with instrumentation.collect():
+        with instrumentation.operation("outer") as outer:
+            with instrumentation.operation("inner") as inner:
+                query()
+            query()
+    assert (inner.queries, inner.rows) == (1, 3)
+    assert (outer.queries, outer.rows) == (2, 6)
+    assert "rows" in outer.as_dict() and "bytes" not in outer.as_dict()
+
+
+def test_worker_queries_count_towards_the_caller(query, executor):
+    with instrumentation.collect():
+        with instrumentation.operation("threaded") as stats:
+            with executor(4) as pool:
+                list(pool.map(lambda _: query(), range(20)))
+
+        async def gather():
+            loop = asyncio.get_running_loop()
+            with executor(4) as pool:
+                await asyncio.gather(
+                    *(loop.run_in_executor(pool, query) for _ in range(10))
+                )
+
+        with instrumentation.operation("async") as async_stats:
+            asyncio.run(gather())
+        query()  # outside of any operation
+    assert (stats.queries, stats.rows) == (20, 60)
+    assert async_stats.queries == 10
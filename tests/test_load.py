@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from element_lab import load
+
+
+class _Connection:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, sql, args=()):
+        self.queries.append((sql, args))
+
+
+def test_update_chunked_sets_changed_attributes():
+    table = SimpleNamespace(
+        primary_key=["lab", "user"],
+        full_table_name="`lab`.`lab_membership`",
+        connection=_Connection(),
+    )
+    updates = [
+        dict(lab="a", user="u1", user_role="PI"),
+        dict(lab="a", user="u2", user_role="Student"),
+        dict(lab="b", user="u1", user_role="Postdoc"),
+    ]
+    assert load.update_chunked(table, updates, chunk_size=2) == 3
+    (sql, args), (_, last_args) = table.connection.queries
+    assert sql == (
+        "UPDATE `lab`.`lab_membership` SET `user_role` = CASE"
+        " WHEN (`lab`, `user`) = (%s, %s) THEN %s"
+        " WHEN (`lab`, `user`) = (%s, %s) THEN %s ELSE `user_role` END"
+        " WHERE (`lab`, `user`) IN ((%s, %s), (%s, %s))"
+    )
+    assert args == ("a", "u1", "PI", "a", "u2", "Student", "a", "u1", "a", "u2")
+    assert last_args == ("b", "u1", "Postdoc", "b", "u1")
+
+
+def test_sync_users_refuses_empty_input():
+    with pytest.raises(ValueError, match="allow_empty"):
+        load.sync_users([])
@@ -0,0 +1,45 @@
+from datetime import date
+
+import pytest
+
+from element_lab import migrate
+
+
+@pytest.fixture
+def legacy_projects(schemas):
+    lab, project = schemas
+    lab.Project.insert(
+        [
+            dict(project="migrate_a", project_description="A"),
+            dict(project="migrate_b", project_description="B"),
+            dict(project="migrate_taken", project_description="Legacy"),
+        ]
+    )
+    project.Project.insert1(
+        dict(
+            project="migrate_taken",
+            project_title="Already in the project schema",
+            project_start_date=date(2020, 1, 1),
+        )
+    )
+    yield
+    (project.Project & "project = 'migrate_taken'").delete_quick()
+    (lab.Project & "project LIKE 'migrate%'").delete_quick()
+
+
+def test_check_reports_name_collisions(legacy_projects):
+    problems = migrate.check_project_migration(
+        start_date=date(2021, 1, 1),
+        rename=dict(migrate_a="migrate_ab", migrate_b="migrate_ab", missing="x"),
+    )
+    assert "Renamed project 'missing' is not in lab.Project" in problems
+    assert (
+        "lab.Project 'migrate_a' and 'migrate_b' would all be named 'migrate_ab'"
+        in problems
+    )
+    assert (
+        "project.Project 'migrate_taken' already exists with another title or start"
+        " date than lab.Project 'migrate_taken'" in problems
+    )
+    with pytest.raises(ValueError, match="nothing was copied"):
+        migrate.migrate_projects(start_date=date(2021, 1, 1))
@@ -0,0 +1,51 @@
+def _keyword_count(project, key) -> int:
+    return (project.ProjectSummary & key).fetch1("keyword_count")
+
+
+def test_refresh_recomputes_changed_projects(schemas):
+    _, project = schemas
+    project.ProjectSummary.refresh(full=True)
+    tracked, untracked = project.Project.fetch("KEY", limit=2)
+    tracked_count = _keyword_count(project, tracked)
+    untracked_count = _keyword_count(project, untracked)
+
+    project.ProjectKeywords.insert1(dict(tracked, keyword="refresh-test"))
+    project.schema.connection.query(  # not recorded by element_lab
+        f"INSERT INTO {project.ProjectKeywords.full_table_name} (project, keyword)"
+        " VALUES (%s, 'refresh-test')",
+        args=(untracked["project"],),
+    )
+    try:
+        assert project.ProjectSummary.refresh() == 1
+        assert _keyword_count(project, tracked) == tracked_count + 1
+        assert _keyword_count(project, untracked) == untracked_count
+        assert project.ProjectSummary.refresh() == 0
+
+        assert project.ProjectSummary.refresh(full=True) == 1
+        assert _keyword_count(project, untracked) == untracked_count + 1
+    finally:
+        (project.ProjectKeywords & "keyword = 'refresh-test'").delete_quick()
+        project.ProjectSummary.refresh()
+
+    # the delete was recorded for both projects
+    assert _keyword_count(project, tracked) == tracked_count
+    assert _keyword_count(project, untracked) == untracked_count
+
+
+def test_generator_insert_marks_its_projects(schemas):
+    _, project = schemas
+    project.ProjectSummary.refresh(full=True)
+    key = project.Project.fetch("KEY", limit=1)[0]
+    count = _keyword_count(project, key)
+
+    project.ProjectKeywords.insert(
+        dict(key, keyword=keyword) for keyword in ("generator-a", "generator-b")
+    )
+    try:
+        assert len(project.ProjectKeywords & key & "keyword LIKE 'generator-%'") == 2
+        assert project.ProjectSummaryChange.fetch("KEY") == [key]
+        assert project.ProjectSummary.refresh() == 1
+        assert _keyword_count(project, key) == count + 2
+    finally:
+        (project.ProjectKeywords & "keyword LIKE 'generator-%'").delete_quick()
+        project.ProjectSummary.refresh()
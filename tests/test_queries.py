@@ -0,0 +1,20 @@
+from element_lab import queries
+
+
+def test_users_by_email_returns_all_matches(schemas):
+    lab, _ = schemas
+    shared = "shared-account@example.org"
+    lab.User.insert(
+        [
+            dict(user="query_test_a", user_email=shared),
+            dict(user="query_test_b", user_email=shared),
+            dict(user="query_test_c"),
+        ]
+    )
+    try:
+        users = queries.users_by_email(shared)
+        assert [user["user"] for user in users] == ["query_test_a", "query_test_b"]
+        assert queries.users_by_email("") == []
+        assert queries.users_by_email("nobody@example.org") == []
+    finally:
+        (lab.User & "user LIKE 'query_test_%'").delete_quick()
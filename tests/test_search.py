@@ -0,0 +1,128 @@
+import gc
+import weakref
+from types import SimpleNamespace
+
+import pytest
+
+from element_lab import search
+
+
+class _Table:
+    """Stand-in for an element_lab table, recording the keys of its fetches."""
+
+    def __init__(self, primary_key, rows, restriction=None, fetches=None):
+        self.primary_key = primary_key
+        self.heading = SimpleNamespace(names=list(rows[0]) if rows else primary_key)
+        self.rows = rows
+        self.restriction = restriction
+        self.fetches = [] if fetches is None else fetches
+
+    def __and__(self, keys):
+        return _Table(self.primary_key, self.rows, keys, self.fetches)
+
+    def fetch(self, *attributes, as_dict=False):
+        rows = [
+            {k: row[k] for k in attributes}
+            for row in self.rows
+            if self.restriction is None
+            or any(all(row[k] == v for k, v in key.items()) for key in self.restriction)
+        ]
+        self.fetches.append(self.restriction)
+        return rows
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    tables = {
+        "lab.User": _Table(
+            ["user"],
+            [
+                dict(user="u1", user_fullname="Ada Lovelace"),
+                dict(user="u2", user_fullname="Alan Turing"),
+                dict(user="u3", user_fullname="Ada Yonath"),
+            ],
+        ),
+        "lab.Protocol": _Table(
+            ["protocol"],
+            [
+                dict(protocol="p1", protocol_description="visual cortex imaging"),
+                dict(protocol="p2", protocol_description="visual cortex and visual"),
+                dict(protocol="p3", protocol_description="auditory cortex"),
+            ],
+        ),
+    }
+    monkeypatch.setattr(search, "element_lab_tables", lambda modules: tables)
+    return tables
+
+
+@pytest.fixture
+def index(tables):
+    index = search.SearchIndex(
+        sources={
+            "lab.User": ("user_fullname",),
+            "lab.Protocol": ("protocol_description",),
+        }
+    )
+    yield index
+    index.close()
+
+
+def _write(table_name, table, method_name, *args):
+    """Change a stand-in table as a hooked element_lab method would."""
+    args = [table, *args]
+    with search._track_changes(table_name, method_name, args, dict()):
+        if method_name == "insert":
+            table.rows.extend(args[1])  # materialized by the hook
+        elif method_name == "update1":
+            (row,) = [r for r in table.rows if r["user"] == args[1]["user"]]
+            row.update(args[1])
+
+
+def test_search_ranks_with_bm25(index):
+    results = index.search("visual cortex", prefix=False)
+    assert [r["key"] for r in results] == [dict(protocol="p2"), dict(protocol="p1")]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert index.search("cortex visual auditory", prefix=False) == []
+
+
+def test_search_expands_the_last_word(index):
+    assert sorted(r["key"]["user"] for r in index.search("ad")) == ["u1", "u3"]
+    assert [r["key"] for r in index.search("ada lov")] == [dict(user="u1")]
+    assert index.search("ada lov", prefix=False) == []
+    assert index.search("cort", tables=["lab.User"]) == []
+
+
+def test_changes_refetch_only_their_rows(index, tables):
+    users = tables["lab.User"]
+    users.fetches.clear()
+    _write("lab.User", users, "insert", iter([dict(user="u4", user_fullname="Grace")]))
+    _write("lab.User", users, "update1", dict(user="u2", user_fullname="Alan Kay"))
+    users.rows.remove(users.rows[0])  # changed outside element_lab
+    assert [r["key"] for r in index.search("grace")] == [dict(user="u4")]
+    assert [r["key"] for r in index.search("kay")] == [dict(user="u2")]
+    assert index.search("turing") == []
+    (restriction,) = users.fetches
+    assert sorted(key["user"] for key in restriction) == ["u2", "u4"]
+    assert tables["lab.Protocol"].fetches == [None]  # the initial fetch only
+    assert [r["key"] for r in index.search("lovelace")] == [dict(user="u1")]
+
+    index.refresh("lab.User")
+    assert index.search("lovelace") == []
+
+
+def test_deletes_refetch_all_sources(index, tables):
+    users = tables["lab.User"]
+    with search._track_changes("lab.Lab", "delete", [None], dict()):
+        users.rows.remove(users.rows[0])
+    assert index.search("lovelace") == []
+    assert users.fetches == [None, None]
+    assert tables["lab.Protocol"].fetches == [None, None]
+
+
+def test_dropped_index_is_not_kept_by_hooks(tables):
+    index = search.SearchIndex(sources={"lab.User": ("user_fullname",)})
+    reference = weakref.ref(index)
+    del index
+    gc.collect()
+    assert reference() is None
+    _write("lab.User", tables["lab.User"], "insert", [dict(user="u4")])
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from element_lab.export.snapshot import SNAPSHOT_FORMAT, Snapshot
+
+TABLES = {
+    "lab.Lab": [
+        dict(lab="one", lab_name="Single"),
+        dict(lab="two", lab_name="Shared"),
+    ],
+    "lab.Lab.Organization": [
+        dict(lab="one", organization="a"),
+        dict(lab="two", organization="a"),
+        dict(lab="two", organization="b"),
+    ],
+    "lab.Organization": [
+        dict(organization="a", org_name="Institute A"),
+        dict(organization="b", org_name="Institute B"),
+    ],
+}
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "v1"
+    path.mkdir()
+    for name, rows in TABLES.items():
+        table = pa.Table.from_pylist(rows)
+        with pa.OSFile(str(path / f"{name}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    manifest = dict(
+        format=SNAPSHOT_FORMAT,
+        version="v1",
+        tables={
+            name: dict(rows=len(rows), file=f"{name}.arrow")
+            for name, rows in TABLES.items()
+        },
+    )
+    (path / "manifest.json").write_text(json.dumps(manifest))
+    return Snapshot(tmp_path, "v1")
+
+
+def test_restrict_ignores_unknown_attributes(snapshot):
+    assert snapshot.restrict("lab.Lab.Organization", dict(lab="two")).num_rows == 2
+    rows = snapshot.restrict(
+        "lab.Lab.Organization", dict(lab="two", organization="b", session=1)
+    ).to_pylist()
+    assert rows == [dict(lab="two", organization="b")]
+    assert snapshot.restrict("lab.Lab", dict(lab="three")).num_rows == 0
+    assert snapshot.restrict("lab.Lab", dict(session=1)).num_rows == 2
+
+
+def test_lab_key_selects_one_organization(snapshot):
+    assert snapshot.element_lab_to_nwb_dict(lab_key=dict(lab="one")) == dict(
+        institution="Institute A", lab="Single"
+    )
+    assert snapshot.element_lab_to_nwb_dict(
+        lab_key=dict(lab="two", organization="b")
+    ) == dict(institution="Institute B", lab="Shared")
+    with pytest.raises(AssertionError, match="Multiple labs"):
+        snapshot.element_lab_to_nwb_dict(lab_key=dict(lab="two"))
@@ -0,0 +1,93 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from element_lab import timezones
+
+
+@pytest.fixture
+def lab_zones(monkeypatch):
+    """Cached lab time zones, as `_load_lab_zones` would fetch them."""
+    zones = {
+        "fixed": "UTC-5",
+        "half": "UTC+05:30",
+        "iana": "America/New_York",
+        "broken": "Mars/Olympus",
+    }
+    monkeypatch.setattr(
+        timezones,
+        "_lab_zones",
+        {lab: (value, timezones._parse(value)) for lab, value in zones.items()},
+    )
+
+
+@pytest.mark.parametrize(
+    "value, offset",
+    [
+        ("UTC", datetime.timedelta(0)),
+        ("UTC-5", datetime.timedelta(hours=-5)),
+        (" UTC+05:30 ", datetime.timedelta(hours=5, minutes=30)),
+        ("UTC+0530", datetime.timedelta(hours=5, minutes=30)),
+        ("UTC+14", datetime.timedelta(hours=14)),
+    ],
+)
+def test_parse_utc_offsets(value, offset):
+    assert timezones.parse_time_zone(value).utcoffset(None) == offset
+
+
+def test_parse_iana_names():
+    zone = timezones.parse_time_zone("America/New_York")
+    assert zone.utcoffset(datetime.datetime(2024, 1, 15)) == datetime.timedelta(
+        hours=-5
+    )
+
+
+@pytest.mark.parametrize("value", ["UTC+15", "UTC+05:75", "Mars/Olympus", "EST-5"])
+def test_parse_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        timezones.parse_time_zone(value)
+
+
+def test_localize_fixed_and_iana_zones(lab_zones):
+    timestamps = [
+        "2024-01-15T09:00",  # EST
+        "2024-07-15T09:00",  # EDT
+        "2024-07-15T09:00",
+        "NaT",
+        "2024-07-15T09:00",
+    ]
+    result = timezones.localize(
+        np.array(timestamps, dtype="datetime64[ns]"),
+        ["iana", "iana", "fixed", "fixed", "half"],
+    )
+    assert str(result.tz) == "UTC"
+    assert list(result[:3]) == [
+        pd.Timestamp("2024-01-15T14:00", tz="UTC"),
+        pd.Timestamp("2024-07-15T13:00", tz="UTC"),
+        pd.Timestamp("2024-07-15T14:00", tz="UTC"),
+    ]
+    assert pd.isna(result[3])
+    assert result[4] == pd.Timestamp("2024-07-15T03:30", tz="UTC")
+
+
+def test_localize_one_lab_for_all(lab_zones):
+    result = timezones.localize(pd.to_datetime(["2024-03-01", "NaT"]), "fixed")
+    assert result[0] == pd.Timestamp("2024-03-01T05:00", tz="UTC")
+    assert pd.isna(result[1])
+
+
+def test_localize_daylight_saving_transitions(lab_zones):
+    skipped = pd.to_datetime(["2024-03-10T02:30"])
+    with pytest.raises(Exception, match="2024-03-10 02:30"):
+        timezones.localize(skipped, "iana")
+    shifted = timezones.localize(skipped, "iana", nonexistent="shift_forward")
+    assert shifted[0] == pd.Timestamp("2024-03-10T07:00", tz="UTC")
+
+
+def test_localize_rejects_unknown_and_invalid_labs(lab_zones):
+    with pytest.raises(ValueError, match="Unknown labs"):
+        timezones.localize(pd.to_datetime(["2024-01-01"]), "nowhere")
+    with pytest.raises(ValueError, match="invalid time zones"):
+        timezones.localize(pd.to_datetime(["2024-01-01"]), "broken")
@@ -0,0 +1,22 @@
+from datetime import date
+from types import SimpleNamespace
+
+from element_lab.utils import after_key, like_prefix, varchar_length
+
+
+def test_after_key_escapes_values():
+    assert after_key(["lab"], ["it's"]) == "(`lab`) > ('it\\'s')"
+    assert (
+        after_key(["project", "start", "n"], ["p", date(2020, 1, 2), 3])
+        == "(`project`, `start`, `n`) > ('p', '2020-01-02', 3)"
+    )
+
+
+def test_varchar_length():
+    assert varchar_length(SimpleNamespace(type="varchar(24)")) == 24
+    assert varchar_length(SimpleNamespace(type="date")) is None
+
+
+def test_like_prefix_escapes_wildcards():
+    assert like_prefix("vis") == '"vis%"'
+    assert like_prefix('a_b%"c') == '"a\\_b\\%\\"c%"'
@@ -0,0 +1,99 @@
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from element_lab import connection, writer
+
+
+class _Connection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Table:
+    """Stand-in for an element_lab table rejecting rows with `fail` set.
+
+    Records the connection that the proxy gives the inserting thread.
+    """
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.rows = []
+        self.connections = []
+
+    def insert(self, rows, skip_duplicates=False):
+        self.connections.append(self.proxy.connection)
+        if any(row.get("fail") for row in rows):
+            raise ValueError("rejected")
+        self.rows.extend(rows)
+
+    def insert1(self, row, skip_duplicates=False):
+        self.insert([row], skip_duplicates=skip_duplicates)
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    """A ThreadLocalConnection over stand-in connections, bound for the writer."""
+    monkeypatch.setattr(connection, "_connect_like", lambda _: _Connection())
+    proxy = connection.ThreadLocalConnection(
+        SimpleNamespace(conn_info=dict()), open_on_demand=False
+    )
+
+    @contextmanager
+    def thread_connections():
+        yield proxy
+
+    monkeypatch.setattr(writer, "thread_connections", thread_connections)
+    return proxy
+
+
+@pytest.fixture
+def tables(monkeypatch, proxy):
+    tables = {"lab.Lab": _Table(proxy), "project.Project": _Table(proxy)}
+    monkeypatch.setattr(writer, "element_lab_tables", lambda modules: tables)
+    return tables
+
+
+def test_raising_on_error_keeps_writing(tables):
+    def on_error(table_name, row, error):
+        raise RuntimeError("callback failed")
+
+    with writer.BufferedWriter(max_delay=60, on_error=on_error) as buffered:
+        buffered.insert("lab.Lab", [dict(lab="a", fail=True), dict(lab="b")])
+        buffered.insert1("project.Project", dict(project="p"))
+        assert buffered.flush() == 3
+
+    assert tables["lab.Lab"].rows == [dict(lab="b")]
+    assert tables["project.Project"].rows == [dict(project="p")]
+    assert [f["row"] for f in buffered.failures] == [dict(lab="a", fail=True)]
+    info = buffered.info()
+    assert (info["pending"], info["rows"], info["failures"]) == (0, 2, 1)
+
+
+def test_flush_runs_on_its_own_connection(tables, proxy):
+    writing, resume = threading.Event(), threading.Event()
+    insert = tables["lab.Lab"].insert
+
+    def blocking_insert(rows, skip_duplicates=False):
+        insert(rows, skip_duplicates)
+        writing.set()
+        assert resume.wait(5)
+
+    tables["lab.Lab"].insert = blocking_insert
+    buffered = writer.BufferedWriter(max_rows=1)
+    buffered.insert1("lab.Lab", dict(lab="a"))
+    assert writing.wait(5)  # a background flush is running
+    tables["project.Project"].insert([dict(project="p")])  # from the caller thread
+    resume.set()
+    buffered.close()
+
+    background, caller = tables["lab.Lab"].connections[0], proxy.connection
+    assert caller is proxy._template
+    assert tables["project.Project"].connections == [caller]
+    assert isinstance(background, _Connection) and background.closed
+    assert tables["lab.Lab"].rows == [dict(lab="a")]